@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Sharded directory layout for the snapshot archive, and migration of flat archives.
+
+Usage:
+    python archive_layout.py migrate snapshots/flightradar24 --layout hour \\
+        [--index snapshots/frames.sqlite3] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+from frame_index import FrameIndex
+
+LAYOUTS = {"flat": "", "day": "%Y/%m/%d", "hour": "%Y/%m/%d/%H"}
+
+# Screencast frames add milliseconds to the stamp: ``_20260101_120000_250Z``.
+FRAME_NAME_RE = re.compile(
+    r"^.+_(?P<stamp>\d{8}_\d{6})(?:_(?P<millis>\d{3}))?Z\.[A-Za-z0-9]+(?:\.ref)?$"
+)
+
+
+def resolve_layout(value: str) -> str:
+    """Map a layout name to its strftime pattern; anything else is taken as a pattern."""
+    pattern = LAYOUTS.get(value, value)
+    if pattern.startswith("/") or ".." in pattern.split("/"):
+        raise ValueError(f"layout must be a relative strftime pattern, got {value!r}")
+    return pattern
+
+
+def shard_path(moment: datetime, pattern: str) -> Path:
+    return Path(moment.strftime(pattern)) if pattern else Path()
+
+
+def frame_moment(name: str) -> datetime | None:
+    match = FRAME_NAME_RE.match(name)
+    if match is None:
+        return None
+    moment = datetime.strptime(match.group("stamp"), "%Y%m%d_%H%M%S")
+    if match.group("millis"):
+        moment = moment.replace(microsecond=int(match.group("millis")) * 1000)
+    return moment.replace(tzinfo=timezone.utc)
+
+
+def stream_root(directory: Path, moment: datetime, patterns: Sequence[str]) -> Path:
+    """``directory`` without the date shard of ``moment`` it ends in, if any of ``patterns``."""
+    for pattern in patterns:
+        shard = shard_path(moment, pattern).parts
+        if shard and directory.parts[-len(shard):] == shard:
+            return Path(*directory.parts[: -len(shard)])
+    return directory
+
+
+def plan_moves(root: Path, pattern: str) -> dict[Path, Path]:
+    """Find frames under ``root`` that are not yet in their shard directory.
+
+    Frames are sharded relative to their stream's folder, so target and crop
+    subfolders keep their own trees. A frame already inside a ``day``,
+    ``hour`` or ``pattern`` shard is moved relative to the folder above that
+    shard, so an archive can be re-sharded from one layout to another. Files
+    already sitting in the right shard are left alone, which makes migration
+    safe to re-run.
+    """
+    known = sorted(
+        {pattern, *LAYOUTS.values()} - {""}, key=lambda known: len(Path(known).parts), reverse=True
+    )
+    moves: dict[Path, Path] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if name != "timelapse"]
+        directory = Path(dirpath)
+        for name in filenames:
+            moment = frame_moment(name)
+            if moment is None:
+                continue
+            dest = stream_root(directory, moment, known) / shard_path(moment, pattern) / name
+            if dest != directory / name:
+                moves[directory / name] = dest
+    return moves
+
+
+def remove_empty_parents(directory: Path, root: Path) -> None:
+    """Remove ``directory`` and its parents below ``root`` while they are empty."""
+    while (
+        directory != root
+        and root in directory.parents
+        and directory.is_dir()
+        and not any(directory.iterdir())
+    ):
+        directory.rmdir()
+        directory = directory.parent
+
+
+def rewrite_ref(ref_path: Path, new_path: Path, moves: dict[Path, Path]) -> None:
+    """Point a moved ``.ref`` file at the (possibly also moved) frame it names."""
+    referenced = (ref_path.parent / ref_path.read_text().strip()).resolve()
+    referenced = moves.get(referenced, referenced)
+    new_path.write_text(os.path.relpath(referenced, new_path.parent) + "\n")
+    if new_path != ref_path:
+        ref_path.unlink()
+
+
+def migrate(
+    root: Path, pattern: str, index: FrameIndex | None = None, dry_run: bool = False
+) -> int:
+    planned = plan_moves(root, pattern)
+    moves = {source.resolve(): dest.resolve() for source, dest in planned.items()}
+    if dry_run:
+        for source, dest in sorted(moves.items()):
+            print(f"{source} -> {dest}")
+        return len(moves)
+
+    refs = []
+    for source, dest in sorted(moves.items()):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if source.name.endswith(".ref"):
+            refs.append((source, dest))
+            continue
+        os.replace(source, dest)
+    for source, dest in refs:
+        rewrite_ref(source, dest, moves)
+    # Shard folders emptied by re-sharding.
+    root = root.resolve()
+    for directory in sorted({source.parent for source in moves}, reverse=True):
+        remove_empty_parents(directory, root)
+
+    if index is not None:
+        index.update_paths(moves)
+    return len(moves)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain the snapshot archive layout.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser(
+        "migrate", help="Move frames of an existing archive into the given layout, in place."
+    )
+    migrate_cmd.add_argument("root", type=Path, help="Archive directory (the --output-dir).")
+    migrate_cmd.add_argument(
+        "--layout",
+        default="hour",
+        help="'flat', 'day', 'hour' or a strftime pattern such as '%%Y/%%m' (default: hour).",
+    )
+    migrate_cmd.add_argument("--index", type=Path, help="Frame index to update as well.")
+    migrate_cmd.add_argument(
+        "--dry-run", action="store_true", help="Print the planned moves without moving anything."
+    )
+
+    args = parser.parse_args()
+    try:
+        pattern = resolve_layout(args.layout)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if not args.root.is_dir():
+        parser.error(f"{args.root} is not a directory.")
+
+    index = FrameIndex(args.index) if args.index and not args.dry_run else None
+    try:
+        moved = migrate(args.root, pattern, index=index, dry_run=args.dry_run)
+    finally:
+        if index is not None:
+            index.close()
+    print(f"{'Would move' if args.dry_run else 'Moved'} {moved} file(s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
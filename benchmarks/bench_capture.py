@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""Measure capture throughput and latency against a local fake map server.
+
+Usage:
+    python benchmarks/bench_capture.py --viewport 1280x720 --viewport 1920x1080 \\
+        --concurrency 1 --concurrency 4 --captures 10 --tile-latency-ms 50
+
+A local HTTP server stands in for Flightradar24: a grid of map tiles served
+with a configurable delay, an animated canvas of "aircraft" and a feed that the
+page polls. For every viewport/concurrency combination one browser is
+launched and ``concurrency`` targets capture back to back through the same
+``TargetRunner`` path the snapshotter uses. The table reports frames per
+second, capture latency percentiles, the mean number of CPU cores used and the
+peak RSS of the browser (this process, the Playwright driver and Chromium).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from capture_metrics import CaptureMetrics  # noqa: E402
+from encoders import FORMATS, OutputFormat  # noqa: E402
+from flight_snapshotter import Target, TargetRunner  # noqa: E402
+from frame_writer import FrameWriter  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+from structured_log import configure_logging  # noqa: E402
+from supervisor import (  # noqa: E402
+    BrowserSupervisor,
+    process_tree_cpu_seconds,
+    process_tree_rss,
+)
+
+FAKE_MAP_PAGE = """<!doctype html>
+<html>
+<head>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; background: #aad3df; }
+  #tiles { position: absolute; inset: 0; display: grid;
+           grid-template-columns: repeat(auto-fill, 256px); }
+  #tiles img { width: 256px; height: 256px; display: block; }
+  #planes { position: absolute; inset: 0; }
+</style>
+</head>
+<body>
+<div id="tiles"></div>
+<canvas id="planes"></canvas>
+<script>
+  const columns = Math.ceil(innerWidth / 256), rows = Math.ceil(innerHeight / 256);
+  const tiles = document.getElementById("tiles");
+  for (let y = 0; y < rows; y++) {
+    for (let x = 0; x < columns; x++) {
+      const img = document.createElement("img");
+      img.src = `/tiles/6/${x}/${y}.svg`;
+      tiles.appendChild(img);
+    }
+  }
+
+  const canvas = document.getElementById("planes");
+  const ctx = canvas.getContext("2d");
+  canvas.width = innerWidth;
+  canvas.height = innerHeight;
+  let planes = [];
+  async function poll() {
+    const response = await fetch("/feed.json?t=" + Date.now());
+    planes = await response.json();
+  }
+  poll();
+  setInterval(poll, {feed_interval_ms});
+
+  function draw(now) {
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    ctx.fillStyle = "#f5b800";
+    for (const plane of planes) {
+      const x = (plane.x + now * plane.vx / 1000) % canvas.width;
+      const y = (plane.y + now * plane.vy / 1000) % canvas.height;
+      ctx.save();
+      ctx.translate((x + canvas.width) % canvas.width, (y + canvas.height) % canvas.height);
+      ctx.rotate(Math.atan2(plane.vy, plane.vx));
+      ctx.beginPath();
+      ctx.moveTo(8, 0); ctx.lineTo(-6, -5); ctx.lineTo(-6, 5);
+      ctx.fill();
+      ctx.restore();
+    }
+    requestAnimationFrame(draw);
+  }
+  requestAnimationFrame(draw);
+</script>
+</body>
+</html>
+"""
+
+TILE_SVG = """<svg xmlns="http://www.w3.org/2000/svg" width="256" height="256">
+<rect width="256" height="256" fill="hsl({hue}, 35%, 82%)" stroke="#ffffff"/>
+<path d="M0 {road} C 80 {bend}, 176 {bend}, 256 {road}" stroke="#ffffff" stroke-width="6"
+  fill="none"/>
+<text x="12" y="28" font-family="sans-serif" font-size="14" fill="#555">{label}</text>
+</svg>
+"""
+
+
+@dataclass(frozen=True)
+class Result:
+    width: int
+    height: int
+    concurrency: int
+    frames: int
+    failures: int
+    seconds: float
+    fps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    cpu_cores: float | None
+    peak_rss_mb: float | None
+
+
+class FakeMapServer:
+    """Serves the fake map page, its tiles and the aircraft feed from a background thread."""
+
+    def __init__(
+        self,
+        tile_latency: float = 0.05,
+        feed_latency: float = 0.1,
+        feed_interval: float = 1.0,
+        planes: int = 300,
+    ) -> None:
+        page = FAKE_MAP_PAGE.replace("{feed_interval_ms}", str(int(feed_interval * 1000))).encode()
+        rng = random.Random(24)
+        feed = json.dumps(
+            [
+                {
+                    "x": rng.uniform(0, 4000),
+                    "y": rng.uniform(0, 3000),
+                    "vx": rng.uniform(-60, 60),
+                    "vy": rng.uniform(-60, 60),
+                }
+                for _ in range(planes)
+            ]
+        ).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = urlsplit(self.path).path
+                if path == "/":
+                    self.reply(page, "text/html; charset=utf-8")
+                elif path == "/feed.json":
+                    time.sleep(feed_latency)
+                    self.reply(feed, "application/json", cache=False)
+                elif path.startswith("/tiles/"):
+                    time.sleep(tile_latency)
+                    self.reply(tile(path), "image/svg+xml")
+                else:
+                    self.send_error(404)
+
+            def reply(self, body: bytes, content_type: str, cache: bool = True) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "max-age=3600" if cache else "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def tile(path: str) -> bytes:
+    label = path.removeprefix("/tiles/").removesuffix(".svg")
+    seed = sum(ord(char) for char in label)
+    return TILE_SVG.format(
+        hue=seed * 37 % 360, road=40 + seed % 170, bend=seed * 7 % 256, label=label
+    ).encode()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def run_scenario(
+    playwright: object,
+    url: str,
+    width: int,
+    height: int,
+    concurrency: int,
+    captures: int,
+    output_dir: Path,
+    live: bool,
+    settle_seconds: float,
+    output_format: OutputFormat,
+    cache: bool,
+) -> Result:
+    supervisor = BrowserSupervisor(playwright, headless=True, max_pages=concurrency)
+    writer = FrameWriter(workers=2, max_pending=16)
+    metrics = CaptureMetrics()
+    scenario = f"{width}x{height}_c{concurrency}"
+    # Every scenario starts with an empty cache, so its first loads are cold.
+    response_cache = (
+        ResponseCache(output_dir / "cache" / scenario, 256 * 1024 * 1024, 86400.0)
+        if cache
+        else None
+    )
+    runners = [
+        TargetRunner(
+            Target(
+                name=f"bench{number}",
+                url=f"{url}?target={number}",
+                output_dir=output_dir / scenario / f"bench{number}",
+                min_minutes=0.0,
+                max_minutes=0.0,
+                page_load_timeout_ms=60000,
+                settle_seconds=settle_seconds,
+                width=width,
+                height=height,
+                live=live,
+                output_format=output_format,
+                watchdog_seconds=120.0,
+            ),
+            supervisor,
+            writer,
+            metrics,
+            response_cache,
+        )
+        for number in range(1, concurrency + 1)
+    ]
+    latencies: list[float] = []
+    failures = 0
+    peak_rss = 0
+
+    async def capture_loop(runner: TargetRunner) -> None:
+        nonlocal failures
+        try:
+            for cycle in range(1, captures + 1):
+                started = time.perf_counter()
+                paths = await runner.capture_guarded(cycle)
+                if paths:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failures += 1
+        finally:
+            await runner.close()
+
+    async def sample_memory() -> None:
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, await asyncio.to_thread(process_tree_rss) or 0)
+            await asyncio.sleep(0.25)
+
+    await supervisor.launch()
+    sampler = asyncio.create_task(sample_memory())
+    cpu_before = process_tree_cpu_seconds()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(capture_loop(runner) for runner in runners))
+        await writer.drain()
+        seconds = time.perf_counter() - started
+        cpu_after = process_tree_cpu_seconds()
+    finally:
+        sampler.cancel()
+        for runner in runners:
+            runner.finish()
+        await supervisor.close()
+        writer.close()
+        if response_cache is not None:
+            response_cache.close()
+
+    cpu_cores = None
+    if cpu_before is not None and cpu_after is not None:
+        # Processes that exited during the run take their CPU time with them,
+        # so this slightly undercounts when contexts are recycled.
+        cpu_cores = (cpu_after - cpu_before) / seconds
+    return Result(
+        width=width,
+        height=height,
+        concurrency=concurrency,
+        frames=len(latencies),
+        failures=failures,
+        seconds=seconds,
+        fps=len(latencies) / seconds,
+        p50_ms=percentile(latencies, 0.50) * 1000,
+        p95_ms=percentile(latencies, 0.95) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        cpu_cores=cpu_cores,
+        peak_rss_mb=peak_rss / 1024 / 1024 if peak_rss else None,
+    )
+
+
+def parse_viewport(value: str) -> tuple[int, int]:
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}") from None
+    return width, height
+
+
+def format_optional(value: float | None, spec: str) -> str:
+    return format(value, spec) if value is not None else "n/a"
+
+
+async def run_all(args: argparse.Namespace, output_dir: Path) -> list[Result]:
+    from playwright.async_api import async_playwright
+
+    server = FakeMapServer(
+        tile_latency=args.tile_latency_ms / 1000,
+        feed_latency=args.feed_latency_ms / 1000,
+        planes=args.planes,
+    )
+    server.start()
+    output_format = OutputFormat(args.format)
+    results = []
+    try:
+        async with async_playwright() as playwright:
+            for width, height in args.viewport or [(1280, 720), (1920, 1080)]:
+                for concurrency in args.concurrency or [1, 4]:
+                    result = await run_scenario(
+                        playwright,
+                        server.url,
+                        width,
+                        height,
+                        concurrency,
+                        args.captures,
+                        output_dir,
+                        args.live,
+                        args.settle_seconds,
+                        output_format,
+                        args.cache,
+                    )
+                    results.append(result)
+                    if args.json:
+                        print(json.dumps(asdict(result)), flush=True)
+                        continue
+                    print(
+                        f"{f'{width}x{height}':<12}{concurrency:>6}{result.frames:>8}"
+                        f"{result.failures:>7}{result.fps:>9.2f}{result.p50_ms:>10.0f}"
+                        f"{result.p95_ms:>10.0f}{result.p99_ms:>10.0f}"
+                        f"{format_optional(result.cpu_cores, '.2f'):>8}"
+                        f"{format_optional(result.peak_rss_mb, '.0f'):>10}",
+                        flush=True,
+                    )
+    finally:
+        server.close()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--viewport",
+        type=parse_viewport,
+        action="append",
+        help="Viewport as WIDTHxHEIGHT; repeat for several (default: 1280x720 and 1920x1080).",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        action="append",
+        help="Number of targets capturing at once; repeat for several (default: 1 and 4).",
+    )
+    parser.add_argument("--captures", type=int, default=10, help="Captures per target.")
+    parser.add_argument(
+        "--live", action="store_true", help="Keep pages open between captures (--live mode)."
+    )
+    parser.add_argument(
+        "--settle-seconds", type=float, default=0.5, help="Wait after page load (default: 0.5)."
+    )
+    parser.add_argument("--format", choices=FORMATS, default="png", help="Output format.")
+    parser.add_argument(
+        "--cache", action="store_true", help="Serve page assets through the disk asset cache."
+    )
+    parser.add_argument(
+        "--tile-latency-ms", type=float, default=50.0, help="Delay of every tile response."
+    )
+    parser.add_argument(
+        "--feed-latency-ms", type=float, default=100.0, help="Delay of every feed response."
+    )
+    parser.add_argument("--planes", type=int, default=300, help="Aircraft drawn on the canvas.")
+    parser.add_argument("--keep-frames", type=Path, help="Write frames here instead of a temp dir.")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario.")
+    parser.add_argument(
+        "--verbose", action="store_true", help="Show the capture log on stderr."
+    )
+    args = parser.parse_args()
+
+    try:
+        import playwright  # noqa: F401
+    except ModuleNotFoundError:
+        parser.error("the capture benchmark needs playwright (`pip install playwright`).")
+
+    pump = configure_logging(stream=sys.stderr) if args.verbose else None
+    if not args.json:
+        print(
+            f"{'viewport':<12}{'conc':>6}{'frames':>8}{'fails':>7}{'fps':>9}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'cores':>8}{'RSS MB':>10}"
+        )
+    try:
+        if args.keep_frames is not None:
+            asyncio.run(run_all(args, args.keep_frames))
+        else:
+            with tempfile.TemporaryDirectory(prefix="bench_capture_") as scratch:
+                asyncio.run(run_all(args, Path(scratch)))
+    finally:
+        if pump is not None:
+            pump.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Compare output size and encode time of the supported formats on sample frames.
+
+Usage:
+    python benchmarks/bench_formats.py snapshots/flightradar24/fr24_*.png
+
+Each input PNG is re-encoded with every format/quality combination; the table
+reports the mean encoded size (absolute and relative to the source PNG) and the
+mean encode time per frame.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from encoders import encode_jpeg, encode_png, encode_webp, require_pillow  # noqa: E402
+
+Encoder = Callable[[bytes], bytes]
+
+
+def build_encoders(qualities: list[int]) -> dict[str, Encoder]:
+    encoders: dict[str, Encoder] = {
+        "png (source)": lambda data: data,
+        "png optimize": lambda data: encode_png(data, optimize=True),
+        "webp lossless": lambda data: encode_webp(data, quality=100, lossless=True),
+    }
+    for quality in qualities:
+        encoders[f"jpeg q{quality}"] = lambda data, q=quality: encode_jpeg(data, q)
+        encoders[f"webp q{quality}"] = lambda data, q=quality: encode_webp(data, q)
+    return encoders
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("frames", nargs="+", type=Path, help="Sample PNG frames.")
+    parser.add_argument(
+        "--quality",
+        type=int,
+        action="append",
+        help="Lossy quality levels to try (default: 60, 75, 85, 95).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Encodes per frame and format.")
+    args = parser.parse_args()
+
+    require_pillow("the format benchmark", "webp")
+    samples = [path.read_bytes() for path in args.frames]
+    source_mean = statistics.mean(len(data) for data in samples)
+
+    print(f"{len(samples)} frame(s), mean source PNG size {source_mean / 1024:.1f} KiB")
+    print(f"{'format':<16}{'mean KiB':>12}{'vs png':>10}{'ms/frame':>12}")
+    for name, encode in build_encoders(args.quality or [60, 75, 85, 95]).items():
+        sizes = []
+        durations = []
+        for data in samples:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                encoded = encode(data)
+                durations.append(time.perf_counter() - started)
+            sizes.append(len(encoded))
+        mean_size = statistics.mean(sizes)
+        print(
+            f"{name:<16}{mean_size / 1024:>12.1f}{mean_size / source_mean:>10.2f}"
+            f"{statistics.mean(durations) * 1000:>12.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Request blocking profiles applied to capture contexts via request routing."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from fnmatch import fnmatch
+
+
+@dataclass(frozen=True)
+class BlockProfile:
+    block_types: frozenset[str] = frozenset()
+    block_urls: tuple[str, ...] = ()
+    allow_urls: tuple[str, ...] = ()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.block_types or self.block_urls)
+
+    def merged(self, other: BlockProfile) -> BlockProfile:
+        return BlockProfile(
+            block_types=self.block_types | other.block_types,
+            block_urls=self.block_urls + other.block_urls,
+            allow_urls=self.allow_urls + other.allow_urls,
+        )
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if any(fnmatch(url, pattern) for pattern in self.allow_urls):
+            return False
+        if resource_type in self.block_types:
+            return True
+        return any(fnmatch(url, pattern) for pattern in self.block_urls)
+
+
+TRACKER_URLS = (
+    "*://*.doubleclick.net/*",
+    "*://*.googlesyndication.com/*",
+    "*://*.googletagservices.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.google-analytics.com/*",
+    "*://*.googleadservices.com/*",
+    "*://adservice.google.com/*",
+    "*://*.amazon-adsystem.com/*",
+    "*://*.adnxs.com/*",
+    "*://*.criteo.com/*",
+    "*://*.criteo.net/*",
+    "*://*.taboola.com/*",
+    "*://*.outbrain.com/*",
+    "*://*.scorecardresearch.com/*",
+    "*://*.quantserve.com/*",
+    "*://*.hotjar.com/*",
+    "*://*.facebook.net/*",
+    "*://*.facebook.com/*",
+    "*://*.twitter.com/*",
+    "*://*.pubmatic.com/*",
+    "*://*.rubiconproject.com/*",
+    "*://*.cookielaw.org/*",
+    "*://*.onetrust.com/*",
+)
+
+PRESETS = {
+    "none": BlockProfile(),
+    # Ads, analytics, consent/promo scripts and media; keeps everything the map
+    # itself needs (scripts, styles, tiles, feed XHRs).
+    "fr24": BlockProfile(
+        block_types=frozenset({"media"}),
+        block_urls=TRACKER_URLS,
+    ),
+    # Also drops web fonts and the non-map promo imagery; labels on the map are
+    # part of the tiles so captures look the same apart from UI text.
+    "fr24-lean": BlockProfile(
+        block_types=frozenset({"media", "font", "manifest", "texttrack", "eventsource"}),
+        block_urls=TRACKER_URLS
+        + (
+            "*://*.flightradar24.com/static/images/promo*",
+            "*://*.flightradar24.com/*/banners/*",
+        ),
+    ),
+}
+
+
+class RequestBlocker:
+    """Routes every request of a context through a :class:`BlockProfile`."""
+
+    def __init__(self, profile: BlockProfile) -> None:
+        self.profile = profile
+        self.blocked = 0
+
+    async def install(self, context: object) -> None:
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route: object) -> None:
+        request = route.request
+        if self.profile.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    def take_count(self) -> int:
+        blocked, self.blocked = self.blocked, 0
+        return blocked
@@ -0,0 +1,154 @@
+"""Per-stage capture timings as Prometheus metrics and a JSON-lines log."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Mapping
+
+from frame_writer import WriteResult
+
+STAGES = ("queue", "navigation", "readiness", "screenshot", "encode", "write")
+
+# Called with the target name, load status and stage timings of every completed capture.
+CaptureListener = Callable[[str, str, Mapping[str, float]], None]
+
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def require_prometheus_client() -> None:
+    try:
+        import prometheus_client  # noqa: F401
+    except ModuleNotFoundError as exc:
+        raise SystemExit(
+            "Missing dependency for --metrics-port: prometheus_client. "
+            "Install with `pip install prometheus-client`."
+        ) from exc
+
+
+class CaptureMetrics:
+    """Collects capture timings and counters.
+
+    With a ``port`` the metrics are served for Prometheus at
+    ``http://host:port/metrics``; with a ``timing_log`` every written frame is
+    appended to it as one JSON object per line. Either may be omitted, in which
+    case the corresponding calls cost next to nothing. ``on_capture`` is
+    also told about every completed capture. Safe to call from the writer
+    threads.
+    """
+
+    def __init__(
+        self,
+        port: int | None = None,
+        timing_log: Path | None = None,
+        host: str = "127.0.0.1",
+        on_capture: CaptureListener | None = None,
+    ) -> None:
+        self.on_capture = on_capture
+        self.prometheus = port is not None
+        if self.prometheus:
+            from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
+
+            registry = CollectorRegistry()
+            self.stage_seconds = Histogram(
+                "websnapper_capture_stage_seconds",
+                "Time spent in each stage of a capture.",
+                ["target", "stage"],
+                buckets=STAGE_BUCKETS,
+                registry=registry,
+            )
+            self.captures = Counter(
+                "websnapper_captures_total",
+                "Completed captures by page load status (ok, load_timeout, not_ready).",
+                ["target", "status"],
+                registry=registry,
+            )
+            self.failures = Counter(
+                "websnapper_capture_failures_total",
+                "Captures abandoned because they hung or raised an error.",
+                ["target", "reason"],
+                registry=registry,
+            )
+            self.frames = Counter(
+                "websnapper_frames_total",
+                "Frames stored, by how they were stored (write, skip, link, ref, failed).",
+                ["target", "action"],
+                registry=registry,
+            )
+            self.bytes_written = Counter(
+                "websnapper_bytes_written_total",
+                "Bytes of image data written to disk.",
+                ["target"],
+                registry=registry,
+            )
+            start_http_server(port, addr=host, registry=registry)
+
+        self.log_lock = threading.Lock()
+        self.log_handle = None
+        if timing_log is not None:
+            timing_log.parent.mkdir(parents=True, exist_ok=True)
+            self.log_handle = open(timing_log, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        with self.log_lock:
+            if self.log_handle is not None:
+                self.log_handle.close()
+                self.log_handle = None
+
+    def capture_completed(self, target: str, status: str, timings: Mapping[str, float]) -> None:
+        if self.on_capture is not None:
+            self.on_capture(target, status, timings)
+        if not self.prometheus:
+            return
+        self.captures.labels(target, status).inc()
+        for stage, seconds in timings.items():
+            self.stage_seconds.labels(target, stage).observe(seconds)
+
+    def capture_failed(self, target: str, reason: str) -> None:
+        if self.prometheus:
+            self.failures.labels(target, reason).inc()
+
+    def frame_written(
+        self,
+        target: str,
+        stream: str,
+        cycle: int,
+        status: str,
+        timings: Mapping[str, float],
+        result: WriteResult | None,
+    ) -> None:
+        if self.prometheus:
+            if result is None:
+                self.frames.labels(target, "failed").inc()
+            else:
+                self.frames.labels(target, result.action).inc()
+                self.bytes_written.labels(target).inc(result.bytes_written)
+                self.stage_seconds.labels(target, "encode").observe(result.encode_seconds)
+                self.stage_seconds.labels(target, "write").observe(result.write_seconds)
+
+        if self.log_handle is None:
+            return
+        entry: dict[str, object] = {
+            "time": round(time.time(), 3),
+            "target": target,
+            "stream": stream,
+            "cycle": cycle,
+            "status": status,
+        }
+        entry.update({stage: round(seconds, 4) for stage, seconds in timings.items()})
+        if result is None:
+            entry["action"] = "failed"
+        else:
+            entry.update(
+                action=result.action,
+                encode=round(result.encode_seconds, 4),
+                write=round(result.write_seconds, 4),
+                bytes=result.bytes_written,
+                path=str(result.path),
+            )
+        line = json.dumps(entry) + "\n"
+        with self.log_lock:
+            if self.log_handle is not None:
+                self.log_handle.write(line)
@@ -0,0 +1,136 @@
+"""Reading snapshotter settings and targets from a YAML, TOML or JSON file."""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Callable, Mapping
+
+CONFIG_FORMATS = {".json": "json", ".toml": "toml", ".yaml": "yaml", ".yml": "yaml"}
+
+
+class OptionsParser(argparse.ArgumentParser):
+    """Argument parser that raises ValueError instead of exiting, for options read from files."""
+
+    def error(self, message: str) -> None:
+        raise ValueError(message)
+
+
+def require_yaml() -> None:
+    try:
+        import yaml  # noqa: F401
+    except ModuleNotFoundError as exc:
+        raise SystemExit(
+            "Missing dependency for YAML config files: PyYAML. Install with `pip install pyyaml`."
+        ) from exc
+
+
+def read_config_file(path: Path) -> dict[str, object]:
+    """Parse ``path`` by its suffix; the top level must be a mapping."""
+    kind = CONFIG_FORMATS.get(path.suffix.lower())
+    if kind is None:
+        raise ValueError(
+            f"{path}: unsupported config file type; use one of {', '.join(CONFIG_FORMATS)}"
+        )
+    text = path.read_text(encoding="utf-8")
+    if kind == "json":
+        document = json.loads(text)
+    elif kind == "toml":
+        import tomllib
+
+        document = tomllib.loads(text)
+    else:
+        import yaml
+
+        try:
+            document = yaml.safe_load(text)
+        except yaml.YAMLError as exc:
+            raise ValueError(f"{path}: {exc}") from None
+    if document is None:
+        document = {}
+    if not isinstance(document, dict):
+        raise ValueError(f"{path}: expected a mapping of options at the top level")
+    return document
+
+
+def file_signature(path: Path) -> tuple[int, int] | None:
+    """Modification time and size of ``path``, or None if it is missing."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ConfigSource:
+    """Where a running snapshotter gets updated configs from.
+
+    ``changed`` is polled on the event loop and must be cheap; ``load`` runs
+    in a worker thread and raises ValueError or OSError if the new config is
+    unusable.
+    """
+
+    def changed(self) -> bool:
+        raise NotImplementedError
+
+    def load(self) -> object:
+        raise NotImplementedError
+
+
+class FileConfigSource(ConfigSource):
+    """A config file, considered changed when its modification time or size changes."""
+
+    def __init__(self, path: Path, loader: Callable[[], object]) -> None:
+        self.path = path
+        self.loader = loader
+        self.seen = file_signature(path)
+
+    def changed(self) -> bool:
+        return file_signature(self.path) != self.seen
+
+    def load(self) -> object:
+        self.seen = file_signature(self.path)
+        return self.loader()
+
+
+def apply_options(
+    parser: argparse.ArgumentParser,
+    base: argparse.Namespace,
+    options: Mapping[str, object],
+    list_options: frozenset[str],
+    where: str,
+) -> argparse.Namespace:
+    """Return a copy of ``base`` with ``options`` applied as if given on the command line.
+
+    Keys are option names without the leading dashes (``min-minutes`` or
+    ``min_minutes``). Values go through ``parser`` so they are converted and
+    checked exactly like command-line arguments. Options that can be repeated
+    take a list (or a single value) and replace, rather than extend, the
+    inherited list; ``null`` resets an option to its built-in default.
+    """
+    namespace = argparse.Namespace(**vars(base))
+    argv = []
+    for key, value in options.items():
+        dest = str(key).replace("-", "_")
+        if dest == "config" or not hasattr(base, dest):
+            raise ValueError(f"{where}: unknown option {key!r}")
+        if value is None:
+            setattr(namespace, dest, parser.get_default(dest))
+            continue
+        if isinstance(value, bool):
+            if not isinstance(getattr(base, dest), bool):
+                raise ValueError(f"{where}: {key!r} does not take {json.dumps(value)}")
+            setattr(namespace, dest, value)
+            continue
+        flag = "--" + dest.replace("_", "-")
+        values = value if isinstance(value, list) else [value]
+        if dest in list_options:
+            setattr(namespace, dest, [])
+        elif isinstance(value, list):
+            raise ValueError(f"{where}: {key!r} takes a single value")
+        argv.extend(f"{flag}={item}" for item in values)
+    try:
+        return parser.parse_args(argv, namespace=namespace)
+    except ValueError as exc:
+        raise ValueError(f"{where}: {exc}") from None
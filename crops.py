@@ -0,0 +1,70 @@
+"""Named crop regions cut out of each captured frame."""
+
+from __future__ import annotations
+
+import io
+import re
+from dataclasses import dataclass
+from functools import partial
+
+from encoders import OutputFormat, save_image
+from frame_writer import FrameProcessor
+
+NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+@dataclass(frozen=True)
+class Crop:
+    """A rectangle in CSS pixels, or the bounding box of the first element matching ``selector``."""
+
+    name: str
+    x: float = 0.0
+    y: float = 0.0
+    width: float = 0.0
+    height: float = 0.0
+    selector: str | None = None
+
+
+def parse_crop(spec: str) -> Crop:
+    """Parse ``NAME=X,Y,WIDTH,HEIGHT`` or ``NAME=selector:CSS``."""
+    name, sep, value = spec.partition("=")
+    name = name.strip()
+    if not sep or not NAME_RE.match(name):
+        raise ValueError(f"expected NAME=X,Y,WIDTH,HEIGHT or NAME=selector:CSS, got {spec!r}")
+    if value.startswith("selector:"):
+        selector = value[len("selector:"):].strip()
+        if not selector:
+            raise ValueError(f"empty selector in crop {spec!r}")
+        return Crop(name=name, selector=selector)
+    try:
+        x, y, width, height = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValueError(f"expected four numbers in crop {spec!r}") from None
+    if x < 0 or y < 0 or width <= 0 or height <= 0:
+        raise ValueError(f"crop {spec!r} must have a non-negative origin and positive size")
+    return Crop(name=name, x=x, y=y, width=width, height=height)
+
+
+async def resolve_clip(page: object, crop: Crop) -> dict[str, float] | None:
+    """Return the clip rectangle for ``crop`` on ``page``, or None if its element is missing."""
+    if crop.selector is None:
+        return {"x": crop.x, "y": crop.y, "width": crop.width, "height": crop.height}
+    box = await page.locator(crop.selector).first.bounding_box()
+    if not box or box["width"] <= 0 or box["height"] <= 0:
+        return None
+    return box
+
+
+def crop_and_encode(data: bytes, clip: dict[str, float], output_format: OutputFormat) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        left = max(0, round(clip["x"]))
+        top = max(0, round(clip["y"]))
+        right = min(image.width, round(clip["x"] + clip["width"]))
+        bottom = min(image.height, round(clip["y"] + clip["height"]))
+        return save_image(image.crop((left, top, right, bottom)), output_format)
+
+
+def crop_processor(clip: dict[str, float], output_format: OutputFormat) -> FrameProcessor:
+    return partial(crop_and_encode, clip=clip, output_format=output_format)
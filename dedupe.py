@@ -0,0 +1,103 @@
+"""Suppression of frames that look the same as the last kept frame of a stream."""
+
+from __future__ import annotations
+
+import io
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+DEDUPE_ACTIONS = ("skip", "link", "ref")
+
+HASH_SIZE = 8
+THUMB_SIZE = (64, 36)
+
+
+@dataclass(frozen=True)
+class DedupeSettings:
+    """``max_distance`` is in dHash bits (0-64); ``max_diff`` is a mean 0-255 gray level."""
+
+    action: str = "skip"
+    max_distance: int = 4
+    max_diff: float | None = None
+
+
+def require_numpy(purpose: str) -> None:
+    try:
+        import numpy  # noqa: F401
+    except ModuleNotFoundError as exc:
+        raise SystemExit(
+            f"Missing dependency for {purpose}: numpy. Install with `pip install numpy`."
+        ) from exc
+
+
+def dhash(image: object) -> int:
+    """64-bit difference hash: one bit per horizontally adjacent pixel pair of a 9x8 thumbnail."""
+    from PIL import Image
+
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def thumbnail(image: object) -> object:
+    import numpy as np
+    from PIL import Image
+
+    small = image.convert("L").resize(THUMB_SIZE, Image.Resampling.BOX)
+    return np.asarray(small, dtype=np.int16)
+
+
+def diff_score(a: object, b: object) -> float:
+    import numpy as np
+
+    if a.shape != b.shape:
+        return 255.0
+    return float(np.abs(a - b).mean())
+
+
+class FrameDeduper:
+    """Remembers the last kept frame of one output stream.
+
+    Frames are compared to the last frame that was *kept*, not merely the last
+    one seen, so a slow drift still produces a new frame once it adds up.
+    Safe to call from several writer threads.
+    """
+
+    def __init__(self, settings: DedupeSettings) -> None:
+        self.settings = settings
+        self.lock = threading.Lock()
+        self.kept_hash: int | None = None
+        self.kept_thumb: object = None
+        self.kept_path: Path | None = None
+
+    def match(self, data: bytes, path: Path) -> Path | None:
+        """Return the kept frame ``data`` duplicates, or None after recording it as kept.
+
+        The caller must write ``path`` whenever None is returned.
+        """
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as image:
+            frame_hash = dhash(image)
+            thumb = thumbnail(image) if self.settings.max_diff is not None else None
+
+        with self.lock:
+            if self.kept_path is not None and self.is_duplicate(frame_hash, thumb):
+                return self.kept_path
+            self.kept_hash = frame_hash
+            self.kept_thumb = thumb
+            self.kept_path = path
+            return None
+
+    def is_duplicate(self, frame_hash: int, thumb: object) -> bool:
+        if bin(frame_hash ^ self.kept_hash).count("1") > self.settings.max_distance:
+            return False
+        if thumb is not None and diff_score(thumb, self.kept_thumb) > self.settings.max_diff:
+            return False
+        return True
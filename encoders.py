@@ -0,0 +1,99 @@
+"""Output image formats for captured frames."""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from functools import partial
+
+from frame_writer import FrameProcessor
+
+FORMATS = ("png", "jpeg", "webp")
+EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+DEFAULT_QUALITY = {"jpeg": 85, "webp": 80}
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    codec: str = "png"
+    quality: int | None = None
+    lossless: bool = False
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.codec]
+
+    @property
+    def effective_quality(self) -> int | None:
+        if self.codec == "png":
+            return None
+        return self.quality if self.quality is not None else DEFAULT_QUALITY[self.codec]
+
+    def screenshot_options(self) -> dict[str, object]:
+        """Keyword arguments for ``page.screenshot``.
+
+        PNG and JPEG are produced by Chromium directly. WebP is not supported
+        there, so Chromium hands over a lossless PNG that the writer re-encodes.
+        """
+        if self.codec == "jpeg":
+            return {"type": "jpeg", "quality": self.effective_quality}
+        return {"type": "png"}
+
+    def processor(self) -> FrameProcessor | None:
+        if self.codec == "webp":
+            return partial(encode_webp, quality=self.effective_quality, lossless=self.lossless)
+        return None
+
+
+def require_pillow(purpose: str, feature: str | None = None) -> None:
+    try:
+        from PIL import features
+    except ModuleNotFoundError as exc:
+        raise SystemExit(
+            f"Missing dependency for {purpose}: Pillow. Install with `pip install Pillow`."
+        ) from exc
+    if feature is not None and not features.check(feature):
+        raise SystemExit(f"Your Pillow build has no {feature} support, needed for {purpose}.")
+
+
+def save_image(image: object, output_format: OutputFormat) -> bytes:
+    """Encode a Pillow image in ``output_format``."""
+    out = io.BytesIO()
+    if output_format.codec == "jpeg":
+        image.convert("RGB").save(out, format="JPEG", quality=output_format.effective_quality)
+    elif output_format.codec == "webp":
+        # method=4 is libwebp's default speed/size trade-off; 6 is ~3x slower
+        # for a few percent smaller files.
+        image.save(
+            out,
+            format="WEBP",
+            quality=output_format.effective_quality,
+            lossless=output_format.lossless,
+            method=4,
+        )
+    else:
+        image.save(out, format="PNG")
+    return out.getvalue()
+
+
+def encode_webp(data: bytes, quality: int, lossless: bool = False) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return save_image(image, OutputFormat("webp", quality=quality, lossless=lossless))
+
+
+def encode_jpeg(data: bytes, quality: int) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return save_image(image, OutputFormat("jpeg", quality=quality))
+
+
+def encode_png(data: bytes, optimize: bool = False) -> bytes:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=optimize)
+        return out.getvalue()
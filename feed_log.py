@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Recording the data feeds a map page downloads, keyed to the frame captured from it.
+
+Every capture appends one record to ``<output>/feed/YYYYMMDD.feedlog``: the
+matching responses the page received since the previous capture (or during
+its load), compressed. Records are framed with their length and a CRC, so a
+log cut short by a crash is read up to its last complete record.
+
+Usage:
+    python feed_log.py dump snapshots/feed/20260101.feedlog --frame 2026/01/01/fr24_20260101_120000Z.png
+    python feed_log.py positions snapshots/feed/20260101.feedlog > positions.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import json
+import struct
+import sys
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, Sequence
+
+MAGIC = b"FEED"
+# Magic, payload length, CRC-32 of the payload, frame capture time.
+HEADER = struct.Struct("<4sIId")
+
+# Fields of an aircraft entry in a Flightradar24 feed.js response, in order.
+FR24_FIELDS = (
+    "icao24", "lat", "lon", "track", "altitude_ft", "speed_kt", "squawk", "radar", "type",
+    "registration", "timestamp", "origin", "destination", "flight", "on_ground",
+    "vertical_speed_fpm", "callsign",
+)
+
+
+@dataclass(frozen=True)
+class FeedResponse:
+    url: str
+    status: int
+    received_at: float
+    body: bytes
+
+
+@dataclass(frozen=True)
+class FeedEntry:
+    """The feed responses recorded with one frame."""
+
+    target: str
+    frame: str
+    captured_at: float
+    responses: tuple[dict, ...]
+
+
+@dataclass(frozen=True)
+class Position:
+    frame: str
+    captured_at: float
+    flight_id: str
+    icao24: str
+    callsign: str
+    lat: float
+    lon: float
+    track: float
+    altitude_ft: float
+    speed_kt: float
+    timestamp: float
+
+
+class FeedRecorder:
+    """Collects the bodies of responses whose URL matches one of ``patterns``."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self.patterns = tuple(patterns)
+        self.responses: list[FeedResponse] = []
+        self.reads: set[asyncio.Task] = set()
+
+    def matches(self, url: str) -> bool:
+        return any(fnmatch(url, pattern) for pattern in self.patterns)
+
+    def attach(self, page: object) -> None:
+        page.on("response", self.on_response)
+
+    def on_response(self, response: object) -> None:
+        if not self.matches(response.url):
+            return
+        task = asyncio.ensure_future(self.read(response, time.time()))
+        self.reads.add(task)
+        task.add_done_callback(self.reads.discard)
+
+    async def read(self, response: object, received_at: float) -> None:
+        from playwright.async_api import Error as PlaywrightError
+
+        try:
+            body = await response.body()
+        except PlaywrightError:
+            # Redirects and responses of closed pages have no body.
+            return
+        self.responses.append(FeedResponse(response.url, response.status, received_at, body))
+
+    async def take(self) -> list[FeedResponse]:
+        """Everything received since the last call; call before closing the page."""
+        if self.reads:
+            await asyncio.wait(set(self.reads))
+        responses, self.responses = self.responses, []
+        return responses
+
+
+def encode_response(response: FeedResponse) -> dict:
+    entry = {"url": response.url, "status": response.status, "received_at": response.received_at}
+    try:
+        entry["json"] = json.loads(response.body)
+    except ValueError:
+        entry["text"] = response.body.decode("utf-8", errors="replace")
+    return entry
+
+
+class FeedLog:
+    """Appends records to one log file per UTC day under ``directory``. Thread-safe."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.path: Path | None = None
+        self.handle = None
+
+    def path_for(self, captured_at: float) -> Path:
+        day = datetime.fromtimestamp(captured_at, timezone.utc).strftime("%Y%m%d")
+        return self.directory / f"{day}.feedlog"
+
+    def append(
+        self, target: str, frame: str, captured_at: float, responses: Sequence[FeedResponse]
+    ) -> int:
+        """Write one record and return its size in bytes."""
+        document = {
+            "target": target,
+            "frame": frame,
+            "responses": [encode_response(response) for response in responses],
+        }
+        payload = zlib.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+        header = HEADER.pack(MAGIC, len(payload), zlib.crc32(payload), captured_at)
+        path = self.path_for(captured_at)
+        with self.lock:
+            if path != self.path:
+                self.close_handle()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self.handle = open(path, "ab")
+                self.path = path
+            self.handle.write(header + payload)
+            self.handle.flush()
+        return len(header) + len(payload)
+
+    def close_handle(self) -> None:
+        if self.handle is not None:
+            self.handle.close()
+        self.handle = self.path = None
+
+    def close(self) -> None:
+        with self.lock:
+            self.close_handle()
+
+
+def read_feed_log(path: Path) -> Iterator[FeedEntry]:
+    """Yield the records of ``path`` in order, stopping at a truncated or corrupt tail."""
+    with open(path, "rb") as handle:
+        while True:
+            header = handle.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            magic, length, crc, captured_at = HEADER.unpack(header)
+            payload = handle.read(length)
+            if magic != MAGIC or len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            document = json.loads(zlib.decompress(payload))
+            yield FeedEntry(
+                target=document["target"],
+                frame=document["frame"],
+                captured_at=captured_at,
+                responses=tuple(document["responses"]),
+            )
+
+
+def fr24_positions(entry: FeedEntry) -> list[Position]:
+    """Aircraft positions in the Flightradar24 feed responses of ``entry``, newest per flight."""
+    latest: dict[str, Position] = {}
+    for response in entry.responses:
+        document = response.get("json")
+        if not isinstance(document, dict):
+            continue
+        for flight_id, values in document.items():
+            if not isinstance(values, list) or len(values) < len(FR24_FIELDS):
+                continue
+            aircraft = dict(zip(FR24_FIELDS, values))
+            try:
+                position = Position(
+                    frame=entry.frame,
+                    captured_at=entry.captured_at,
+                    flight_id=flight_id,
+                    icao24=str(aircraft["icao24"]),
+                    callsign=str(aircraft["callsign"]),
+                    lat=float(aircraft["lat"]),
+                    lon=float(aircraft["lon"]),
+                    track=float(aircraft["track"]),
+                    altitude_ft=float(aircraft["altitude_ft"]),
+                    speed_kt=float(aircraft["speed_kt"]),
+                    timestamp=float(aircraft["timestamp"]),
+                )
+            except (TypeError, ValueError):
+                continue
+            previous = latest.get(flight_id)
+            if previous is None or position.timestamp >= previous.timestamp:
+                latest[flight_id] = position
+    return list(latest.values())
+
+
+def cmd_dump(args: argparse.Namespace) -> int:
+    for entry in read_feed_log(Path(args.log)):
+        if args.frame and entry.frame != args.frame:
+            continue
+        print(json.dumps(asdict(entry)))
+    return 0
+
+
+def cmd_positions(args: argparse.Namespace) -> int:
+    writer = csv.writer(sys.stdout)
+    writer.writerow(field.name for field in fields(Position))
+    for entry in read_feed_log(Path(args.log)):
+        for position in fr24_positions(entry):
+            writer.writerow(asdict(position).values())
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump = sub.add_parser("dump", help="Print records as JSON lines.")
+    dump.add_argument("log")
+    dump.add_argument("--frame", help="Only the record of this frame (path under the target).")
+    dump.set_defaults(func=cmd_dump)
+
+    positions = sub.add_parser(
+        "positions", help="Print Flightradar24 aircraft positions per frame as CSV."
+    )
+    positions.add_argument("log")
+    positions.set_defaults(func=cmd_positions)
+
+    args = parser.parse_args()
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,21 +4,79 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import base64
+import functools
+import hashlib
+import logging
+import os
 import random
 import signal
 import sys
+import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Awaitable, Callable, Sequence, TypeVar
 
+from archive_layout import LAYOUTS, resolve_layout, shard_path
+from blocking import PRESETS, BlockProfile, RequestBlocker
+from capture_metrics import CaptureListener, CaptureMetrics, require_prometheus_client
+from config_file import (
+    CONFIG_FORMATS,
+    ConfigSource,
+    FileConfigSource,
+    OptionsParser,
+    apply_options,
+    read_config_file,
+    require_yaml,
+)
+from crops import NAME_RE, Crop, crop_processor, parse_crop, resolve_clip
+from dedupe import DEDUPE_ACTIONS, DedupeSettings, FrameDeduper, require_numpy
+from encoders import FORMATS, OutputFormat, require_pillow
+from frame_index import FrameIndex, FrameRecord
+from feed_log import FeedLog, FeedRecorder, FeedResponse
+from frame_writer import FrameProcessor, FrameWriter
+from leases import LeaseConfigSource, LeaseStore, default_node_id
+from readiness import build_checks, wait_until_ready
+from response_cache import ResponseCache
+from scheduler import GridScheduler
+from structured_log import LOG_FORMATS, configure_logging
+from supervisor import BrowserSupervisor, close_quietly
+from timelapse import CONTAINERS, TimelapseEncoder, TimelapseSettings, require_ffmpeg
+from views import NAVIGATE_JS, View, navigation, parse_view
+from workers import WorkerPool
 
 
 DEFAULT_URL = "https://www.flightradar24.com/52.81,-117.08/6"
+DEFAULT_TARGET_NAME = "fr24"
+
+# Options that may be repeated on the command line, and so take lists in config files.
+LIST_OPTIONS = frozenset(
+    {
+        "url", "ready_network", "block_type", "block_url", "allow_url", "crop", "view",
+        "record_feed",
+    }
+)
+# Options that apply to the whole process rather than to a target.
+GLOBAL_OPTIONS = frozenset(
+    {
+        "headed", "max_pages", "max_browser_rss_mb", "cache_dir", "cache_max_mb", "cache_ttl",
+        "index", "metrics_port", "metrics_host", "timing_log", "log_format", "log_file",
+        "log_max_mb", "log_backups", "writer_threads", "max_pending_writes", "config_poll",
+        "workers", "worker_max_lag", "lease_db", "lease_seconds", "node_id",
+    }
+)
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
-class Config:
+class Target:
+    name: str
     url: str
     output_dir: Path
     min_minutes: float
@@ -27,17 +85,77 @@ class Config:
     settle_seconds: float
     width: int
     height: int
+    live: bool = False
+    reload_every: int = 0
+    stale_frames: int = 0
+    ready_selector: str | None = None
+    ready_js: str | None = None
+    ready_stable_frames: int = 0
+    ready_network: tuple[str, ...] = ()
+    ready_network_quiet_seconds: float = 0.5
+    block_profile: BlockProfile = BlockProfile()
+    output_format: OutputFormat = OutputFormat()
+    crops: tuple[Crop, ...] = ()
+    views: tuple[View, ...] = ()
+    view_settle_seconds: float = 2.0
+    view_script: str = NAVIGATE_JS
+    timelapse: TimelapseSettings | None = None
+    dedupe: DedupeSettings | None = None
+    layout: str = ""
+    align_seconds: float = 0.0
+    align_offset_seconds: float = 0.0
+    recycle_every: int = 0
+    watchdog_seconds: float = 300.0
+    feed_patterns: tuple[str, ...] = ()
+    screencast_fps: float | None = None
+    screencast_seconds: float = 10.0
+
+
+@dataclass(frozen=True)
+class Config:
+    targets: tuple[Target, ...]
     headless: bool
+    max_pages: int
+    max_browser_rss_mb: float | None = None
+    cache_dir: Path | None = None
+    cache_max_mb: float = 512.0
+    cache_ttl_seconds: float = 86400.0
+    index_path: Path | None = None
+    writer_threads: int = 2
+    metrics_port: int | None = None
+    metrics_host: str = "127.0.0.1"
+    timing_log: Path | None = None
+    max_pending_writes: int = 16
+    log_format: str = "console"
+    log_file: Path | None = None
+    log_max_mb: float = 50.0
+    log_backups: int = 5
+    config_file: Path | None = None
+    config_poll_seconds: float = 2.0
+    workers: int | None = None
+    worker_max_lag_seconds: float = 60.0
+    lease_db: Path | None = None
+    lease_seconds: float = 30.0
+    node_id: str | None = None
 
 
-def parse_args() -> Config:
-    parser = argparse.ArgumentParser(
+def build_parser(
+    parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser,
+) -> argparse.ArgumentParser:
+    parser = parser_class(
         description=(
             "Take recurring screenshots of a Flightradar24 map view every 5-10 minutes "
             "(or your custom interval)."
         )
     )
-    parser.add_argument("--url", default=DEFAULT_URL, help="Map URL to capture.")
+    parser.add_argument(
+        "--url",
+        action="append",
+        help=(
+            "Map URL to capture. Repeat to capture several targets from one browser; "
+            "each extra target gets its own subfolder of --output-dir."
+        ),
+    )
     parser.add_argument(
         "--output-dir",
         default="snapshots/flightradar24",
@@ -55,6 +173,20 @@ def parse_args() -> Config:
         default=10.0,
         help="Maximum minutes to wait between snapshots.",
     )
+    parser.add_argument(
+        "--align-minutes",
+        type=float,
+        help=(
+            "Capture on a fixed wall-clock grid instead of random intervals, e.g. 5 for "
+            ":00, :05, :10, ... Capture time does not shift later captures."
+        ),
+    )
+    parser.add_argument(
+        "--align-offset",
+        type=float,
+        default=0.0,
+        help="Seconds to shift the --align-minutes grid by (e.g. 30 for :00:30, :05:30, ...).",
+    )
     parser.add_argument(
         "--page-load-timeout",
         type=int,
@@ -65,7 +197,43 @@ def parse_args() -> Config:
         "--settle-seconds",
         type=float,
         default=8.0,
-        help="Extra seconds to wait after page load before screenshot.",
+        help=(
+            "Extra seconds to wait after page load before screenshot. When any --ready-* "
+            "check is given this is the maximum time to wait for it instead."
+        ),
+    )
+    parser.add_argument(
+        "--ready-selector",
+        help="Capture as soon as this CSS selector is visible.",
+    )
+    parser.add_argument(
+        "--ready-js",
+        help="Capture as soon as this JavaScript expression evaluates truthy in the page.",
+    )
+    parser.add_argument(
+        "--ready-stable-frames",
+        type=int,
+        default=0,
+        help=(
+            "Capture once this many consecutive frames, rendered at a quarter of the "
+            "viewport size, are identical."
+        ),
+    )
+    parser.add_argument(
+        "--ready-network",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help=(
+            "Capture once no request matching this URL glob is in flight "
+            "(e.g. '*data-cloud.flightradar24.com*'). May be repeated."
+        ),
+    )
+    parser.add_argument(
+        "--ready-network-quiet",
+        type=float,
+        default=0.5,
+        help="Seconds without matching requests before --ready-network counts as quiet.",
     )
     parser.add_argument("--width", type=int, default=1920, help="Browser width in pixels.")
     parser.add_argument("--height", type=int, default=1080, help="Browser height in pixels.")
@@ -74,120 +242,1581 @@ def parse_args() -> Config:
         action="store_true",
         help="Run with a visible browser window (default is headless).",
     )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help=(
+            "Load each page once and re-screenshot the running map every cycle instead "
+            "of reloading it."
+        ),
+    )
+    parser.add_argument(
+        "--reload-every",
+        type=int,
+        default=0,
+        help="In --live mode, hard-reload the page after this many captures (0 = never).",
+    )
+    parser.add_argument(
+        "--stale-frames",
+        type=int,
+        default=3,
+        help=(
+            "In --live mode, hard-reload once this many consecutive captures are "
+            "byte-identical to the previous one (0 = disabled)."
+        ),
+    )
+    parser.add_argument(
+        "--screencast",
+        type=float,
+        metavar="FPS",
+        help=(
+            "Each cycle, record --screencast-seconds of the page's own screencast stream, "
+            "keeping up to FPS frames per second, instead of taking one screenshot."
+        ),
+    )
+    parser.add_argument(
+        "--screencast-seconds",
+        type=float,
+        default=10.0,
+        help="Length of each --screencast recording (default: 10).",
+    )
+    parser.add_argument(
+        "--block-profile",
+        choices=sorted(PRESETS),
+        default="none",
+        help=(
+            "Preset of requests to block during page loads: 'fr24' drops ads, analytics "
+            "and consent/promo scripts; 'fr24-lean' also drops fonts and promo imagery."
+        ),
+    )
+    parser.add_argument(
+        "--block-type",
+        action="append",
+        default=[],
+        metavar="TYPE",
+        help="Also block this Playwright resource type (e.g. image, font, media). May be repeated.",
+    )
+    parser.add_argument(
+        "--block-url",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Also block requests whose URL matches this glob. May be repeated.",
+    )
+    parser.add_argument(
+        "--allow-url",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Never block requests whose URL matches this glob. May be repeated.",
+    )
+    parser.add_argument(
+        "--recycle-every",
+        type=int,
+        default=0,
+        help=(
+            "In --live mode, replace the browser context (and its renderer process) after "
+            "this many captures to keep memory in check (0 = never)."
+        ),
+    )
+    parser.add_argument(
+        "--watchdog-seconds",
+        type=float,
+        default=0.0,
+        help=(
+            "Abandon a capture that takes longer than this and retry on a fresh context "
+            "(default: page load timeout + settle time + 60 s)."
+        ),
+    )
+    parser.add_argument(
+        "--max-browser-rss-mb",
+        type=float,
+        help=(
+            "Restart the browser when this process and its Chromium processes use more "
+            "resident memory than this (Linux only)."
+        ),
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        default=4,
+        help="Maximum number of pages captured concurrently across all targets.",
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Keep a disk cache of static page assets (scripts, styles, images, fonts) in "
+            "this directory, shared by all targets and kept across restarts."
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=512.0,
+        help="Maximum size of the asset cache in megabytes (least recently used evicted first).",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=86400.0,
+        help="Seconds to keep cached assets whose response has no Cache-Control max-age.",
+    )
 
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="png",
+        help=(
+            "Image format to save. jpeg is encoded by Chromium; webp is re-encoded from a "
+            "lossless capture by the writer threads and needs Pillow."
+        ),
+    )
+    parser.add_argument(
+        "--quality",
+        type=int,
+        help="Quality 1-100 for jpeg (default 85) and lossy webp (default 80).",
+    )
+    parser.add_argument(
+        "--lossless",
+        action="store_true",
+        help="Save lossless webp (only with --format webp).",
+    )
+    parser.add_argument(
+        "--crop",
+        action="append",
+        default=[],
+        metavar="NAME=X,Y,W,H",
+        help=(
+            "Save only this region, in CSS pixels, to the NAME subfolder. Use "
+            "NAME=selector:CSS to crop to an element instead. Repeat for several crops; "
+            "they are all cut from the same frame (needs Pillow for more than one)."
+        ),
+    )
+    parser.add_argument(
+        "--view",
+        action="append",
+        default=[],
+        metavar="NAME=[WxH][@LAT,LON/ZOOM][+X,Y,W,H]",
+        help=(
+            "After each capture, also save this view of the same loaded page to the NAME "
+            "subfolder: another viewport size, another map position (moved in place, "
+            "without a page load) and/or a clip. Repeat for several views."
+        ),
+    )
+    parser.add_argument(
+        "--view-settle",
+        type=float,
+        default=2.0,
+        help=(
+            "Seconds to let the map redraw after a view changes the viewport or position "
+            "(default: 2; with --ready-* checks, the ceiling for them instead)."
+        ),
+    )
+    parser.add_argument(
+        "--view-js",
+        help=(
+            "JavaScript function that moves the map to a view in place. It gets "
+            "{path, lat, lon, zoom}; the default pushes path (/LAT,LON/ZOOM) onto the "
+            "page history and fires popstate."
+        ),
+    )
+    parser.add_argument(
+        "--timelapse",
+        choices=CONTAINERS,
+        help=(
+            "Also stream every frame into an ffmpeg H.264 timelapse, written as segmented "
+            "MP4 (with an ffconcat manifest) or HLS into a 'timelapse' subfolder."
+        ),
+    )
+    parser.add_argument(
+        "--timelapse-fps",
+        type=float,
+        default=30.0,
+        help="Frame rate of the timelapse video.",
+    )
+    parser.add_argument(
+        "--timelapse-segment",
+        type=float,
+        default=60.0,
+        help="Length of each timelapse segment in seconds of video.",
+    )
+    parser.add_argument(
+        "--timelapse-crf",
+        type=int,
+        default=23,
+        help="x264 constant rate factor for the timelapse (lower is better quality).",
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=DEDUPE_ACTIONS,
+        help=(
+            "Detect frames that look the same as the last kept frame (perceptual hash) and "
+            "skip them, hard-link them to that frame, or write a small .ref file naming it. "
+            "Needs Pillow."
+        ),
+    )
+    parser.add_argument(
+        "--dedupe-distance",
+        type=int,
+        default=4,
+        help="Maximum perceptual-hash distance (0-64 bits) for a frame to count as a duplicate.",
+    )
+    parser.add_argument(
+        "--dedupe-diff",
+        type=float,
+        help=(
+            "Additionally require the mean gray-level difference of downsampled frames "
+            "(0-255) to be at most this value. Needs NumPy."
+        ),
+    )
+    parser.add_argument(
+        "--layout",
+        default="flat",
+        help=(
+            "Directory layout below each target/crop folder: 'flat' (default), 'day' "
+            f"({LAYOUTS['day'].replace('%', '%%')}), "
+            f"'hour' ({LAYOUTS['hour'].replace('%', '%%')}) or any strftime pattern "
+            "(UTC). Use `python archive_layout.py migrate` to re-shard an existing archive."
+        ),
+    )
+    parser.add_argument(
+        "--record-feed",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help=(
+            "Save responses whose URL matches this glob with each frame, in "
+            "<output>/feed/YYYYMMDD.feedlog (e.g. '*/zones/fcgi/feed.js*'). May be repeated."
+        ),
+    )
+    parser.add_argument(
+        "--index",
+        help=(
+            "Record every frame (target, time, path, size, hash, timings, status) in this "
+            "SQLite file; query it with `python frame_index.py`."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help=(
+            "Serve Prometheus metrics (stage timings, captures, failures, bytes written) "
+            "on this port. Needs prometheus-client."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="Address for --metrics-port to listen on (default: localhost only).",
+    )
+    parser.add_argument(
+        "--timing-log",
+        help="Append per-frame stage timings to this file as JSON lines.",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default="console",
+        help="Console output as readable lines (default) or JSON lines.",
+    )
+    parser.add_argument(
+        "--log-file",
+        help="Also write the log to this file as JSON lines, rotated by size.",
+    )
+    parser.add_argument(
+        "--log-max-mb",
+        type=float,
+        default=50.0,
+        help="Rotate --log-file once it reaches this size (default: 50).",
+    )
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=5,
+        help="Rotated log files to keep (default: 5).",
+    )
+    parser.add_argument(
+        "--writer-threads",
+        type=int,
+        default=2,
+        help="Background threads that post-process and write captured frames.",
+    )
+    parser.add_argument(
+        "--max-pending-writes",
+        type=int,
+        default=16,
+        help="Frames that may wait in memory for the writer before capturing pauses.",
+    )
+    parser.add_argument(
+        "--config",
+        help=(
+            "YAML, TOML or JSON file with options and a list of targets. Command-line "
+            "options become its defaults. Reloaded on change or SIGHUP without restarting "
+            "the browser."
+        ),
+    )
+    parser.add_argument(
+        "--config-poll",
+        type=float,
+        default=2.0,
+        help="Seconds between checks of --config for changes (default: 2; 0 = SIGHUP only).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=(
+            "Spread the targets over this many worker processes, each with its own "
+            "browser (0 = one per CPU core)."
+        ),
+    )
+    parser.add_argument(
+        "--worker-max-lag",
+        type=float,
+        default=60.0,
+        help=(
+            "Move a target to another worker once its captures wait this many seconds "
+            "for a free page (default: 60)."
+        ),
+    )
+    parser.add_argument(
+        "--lease-db",
+        help=(
+            "SQLite file shared by several snapshotter nodes. Each node captures only the "
+            "targets it holds a lease on, and takes over those of nodes that stop."
+        ),
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=30.0,
+        help="How long a lease lasts without renewal (default: 30).",
+    )
+    parser.add_argument(
+        "--node-id",
+        help="Name of this node in --lease-db (default: hostname:pid).",
+    )
+    return parser
+
+
+def make_target(args: argparse.Namespace, name: str, url: str, output_dir: Path) -> Target:
+    """Build a target from parsed options; raises ValueError for invalid combinations."""
     if args.min_minutes <= 0 or args.max_minutes <= 0:
-        parser.error("--min-minutes and --max-minutes must be greater than zero.")
+        raise ValueError("--min-minutes and --max-minutes must be greater than zero.")
     if args.max_minutes < args.min_minutes:
-        parser.error("--max-minutes must be greater than or equal to --min-minutes.")
+        raise ValueError("--max-minutes must be greater than or equal to --min-minutes.")
+    if args.align_minutes is not None and args.align_minutes <= 0:
+        raise ValueError("--align-minutes must be greater than zero.")
+    if args.quality is not None and args.format == "png":
+        raise ValueError("--quality only applies to --format jpeg or webp.")
+    if args.quality is not None and not 1 <= args.quality <= 100:
+        raise ValueError("--quality must be between 1 and 100.")
+    if args.lossless and args.format != "webp":
+        raise ValueError("--lossless only applies to --format webp.")
+    if args.timelapse_fps <= 0 or args.timelapse_segment <= 0:
+        raise ValueError("--timelapse-fps and --timelapse-segment must be greater than zero.")
+    if not 0 <= args.dedupe_distance <= 64:
+        raise ValueError("--dedupe-distance must be between 0 and 64.")
+    if args.dedupe_diff is not None and args.dedupe_diff < 0:
+        raise ValueError("--dedupe-diff must not be negative.")
+    if args.recycle_every < 0 or args.watchdog_seconds < 0:
+        raise ValueError("--recycle-every and --watchdog-seconds must not be negative.")
+    if args.reload_every < 0 or args.stale_frames < 0:
+        raise ValueError("--reload-every and --stale-frames must not be negative.")
+    if args.ready_stable_frames < 0 or args.ready_network_quiet < 0:
+        raise ValueError("--ready-stable-frames and --ready-network-quiet must not be negative.")
+    if args.view_settle < 0:
+        raise ValueError("--view-settle must not be negative.")
+    if args.screencast is not None:
+        if args.screencast <= 0 or args.screencast_seconds <= 0:
+            raise ValueError("--screencast and --screencast-seconds must be greater than zero.")
+        if args.view:
+            raise ValueError("--screencast cannot be combined with --view.")
 
-    return Config(
-        url=args.url,
-        output_dir=Path(args.output_dir),
+    block_profile = PRESETS[args.block_profile].merged(
+        BlockProfile(
+            block_types=frozenset(args.block_type),
+            block_urls=tuple(args.block_url),
+            allow_urls=tuple(args.allow_url),
+        )
+    )
+
+    output_format = OutputFormat(codec=args.format, quality=args.quality, lossless=args.lossless)
+
+    timelapse = None
+    if args.timelapse:
+        timelapse = TimelapseSettings(
+            container=args.timelapse,
+            fps=args.timelapse_fps,
+            segment_seconds=args.timelapse_segment,
+            crf=args.timelapse_crf,
+        )
+
+    try:
+        layout = resolve_layout(args.layout)
+    except ValueError as exc:
+        raise ValueError(f"--layout: {exc}") from None
+
+    dedupe = None
+    if args.dedupe:
+        dedupe = DedupeSettings(
+            action=args.dedupe, max_distance=args.dedupe_distance, max_diff=args.dedupe_diff
+        )
+
+    crops = []
+    for spec in args.crop:
+        try:
+            crops.append(parse_crop(spec))
+        except ValueError as exc:
+            raise ValueError(f"--crop: {exc}") from None
+    if len({crop.name for crop in crops}) != len(crops):
+        raise ValueError("--crop names must be unique.")
+    views = []
+    for spec in args.view:
+        try:
+            views.append(parse_view(spec))
+        except ValueError as exc:
+            raise ValueError(f"--view: {exc}") from None
+    names = [crop.name for crop in crops] + [view.name for view in views]
+    if len(set(names)) != len(names):
+        raise ValueError("--view and --crop names must be unique.")
+
+    return Target(
+        name=name,
+        url=url,
+        output_dir=output_dir,
         min_minutes=args.min_minutes,
         max_minutes=args.max_minutes,
         page_load_timeout_ms=args.page_load_timeout,
         settle_seconds=args.settle_seconds,
         width=args.width,
         height=args.height,
+        live=args.live,
+        reload_every=args.reload_every,
+        stale_frames=args.stale_frames,
+        ready_selector=args.ready_selector,
+        ready_js=args.ready_js,
+        ready_stable_frames=args.ready_stable_frames,
+        ready_network=tuple(args.ready_network),
+        ready_network_quiet_seconds=args.ready_network_quiet,
+        block_profile=block_profile,
+        output_format=output_format,
+        crops=tuple(crops),
+        views=tuple(views),
+        view_settle_seconds=args.view_settle,
+        view_script=args.view_js or NAVIGATE_JS,
+        timelapse=timelapse,
+        dedupe=dedupe,
+        layout=layout,
+        align_seconds=(args.align_minutes or 0.0) * 60.0,
+        align_offset_seconds=args.align_offset,
+        recycle_every=args.recycle_every,
+        watchdog_seconds=(
+            args.watchdog_seconds
+            or args.page_load_timeout / 1000.0 + args.settle_seconds + 60.0
+            + (args.screencast_seconds if args.screencast is not None else 0.0)
+        ),
+        feed_patterns=tuple(args.record_feed),
+        screencast_fps=args.screencast,
+        screencast_seconds=args.screencast_seconds,
+    )
+
+
+def make_config(
+    args: argparse.Namespace, targets: Sequence[Target], config_file: Path | None = None
+) -> Config:
+    """Build the process-wide settings; raises ValueError for invalid values."""
+    if args.max_pages < 1:
+        raise ValueError("--max-pages must be at least 1.")
+    if args.writer_threads < 1 or args.max_pending_writes < 1:
+        raise ValueError("--writer-threads and --max-pending-writes must be at least 1.")
+    if args.cache_max_mb <= 0 or args.cache_ttl <= 0:
+        raise ValueError("--cache-max-mb and --cache-ttl must be greater than zero.")
+    if args.max_browser_rss_mb is not None and args.max_browser_rss_mb <= 0:
+        raise ValueError("--max-browser-rss-mb must be greater than zero.")
+    if args.log_max_mb <= 0 or args.log_backups < 1:
+        raise ValueError("--log-max-mb must be greater than zero and --log-backups at least 1.")
+    if args.config_poll < 0:
+        raise ValueError("--config-poll must not be negative.")
+    if args.workers is not None and args.workers < 0:
+        raise ValueError("--workers must not be negative.")
+    if args.worker_max_lag <= 0:
+        raise ValueError("--worker-max-lag must be greater than zero.")
+    if args.lease_seconds < 10:
+        raise ValueError("--lease-seconds must be at least 10.")
+    if args.lease_db and not 0 < args.config_poll < args.lease_seconds / 3:
+        raise ValueError(
+            "--lease-db needs --config-poll above zero and below a third of --lease-seconds."
+        )
+
+    return Config(
+        targets=tuple(targets),
         headless=not args.headed,
+        max_pages=args.max_pages,
+        max_browser_rss_mb=args.max_browser_rss_mb,
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+        cache_max_mb=args.cache_max_mb,
+        cache_ttl_seconds=args.cache_ttl,
+        index_path=Path(args.index) if args.index else None,
+        writer_threads=args.writer_threads,
+        metrics_port=args.metrics_port,
+        metrics_host=args.metrics_host,
+        timing_log=Path(args.timing_log) if args.timing_log else None,
+        max_pending_writes=args.max_pending_writes,
+        log_format=args.log_format,
+        log_file=Path(args.log_file) if args.log_file else None,
+        log_max_mb=args.log_max_mb,
+        log_backups=args.log_backups,
+        config_file=config_file,
+        config_poll_seconds=args.config_poll,
+        workers=args.workers,
+        worker_max_lag_seconds=args.worker_max_lag,
+        lease_db=Path(args.lease_db) if args.lease_db else None,
+        lease_seconds=args.lease_seconds,
+        node_id=args.node_id,
     )
 
 
+def config_from_args(args: argparse.Namespace, config_file: Path | None = None) -> Config:
+    """Targets from the --url list: one writes to --output-dir, several to subfolders of it."""
+    urls = args.url or [DEFAULT_URL]
+    output_dir = Path(args.output_dir)
+    targets = []
+    for index, url in enumerate(urls, start=1):
+        if len(urls) == 1:
+            name, target_dir = DEFAULT_TARGET_NAME, output_dir
+        else:
+            name = f"{DEFAULT_TARGET_NAME}{index}"
+            target_dir = output_dir / name
+        targets.append(make_target(args, name, url, target_dir))
+    return make_config(args, targets, config_file)
+
+
+def load_config(args: argparse.Namespace) -> Config:
+    """Build the config from the command line and, with --config, the config file.
+
+    The file's top-level options override the command line, and each entry of
+    its ``targets`` list overrides those for one target. Raises ValueError
+    (with the file and target named) if anything is invalid.
+    """
+    if args.config is None:
+        return config_from_args(args)
+
+    path = Path(args.config)
+    if CONFIG_FORMATS.get(path.suffix.lower()) == "yaml":
+        require_yaml()
+    document = read_config_file(path)
+    entries = document.pop("targets", None)
+    parser = build_parser(OptionsParser)
+    options = apply_options(parser, args, document, LIST_OPTIONS, str(path))
+    if entries is None:
+        return config_from_args(options, path)
+    if "url" in document:
+        raise ValueError(f"{path}: set 'url' on each entry of 'targets'")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: 'targets' must be a non-empty list")
+
+    targets = []
+    for number, entry in enumerate(entries, start=1):
+        where = f"{path}: target {number}"
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where}: expected a mapping of options")
+        entry = dict(entry)
+        name = str(entry.pop("name", ""))
+        url = entry.pop("url", None)
+        if not NAME_RE.match(name):
+            raise ValueError(f"{where}: 'name' is required (letters, digits, '_', '.', '-')")
+        if not isinstance(url, str) or not url:
+            raise ValueError(f"{where}: 'url' is required")
+        where = f"{path}: target {name!r}"
+        global_keys = sorted(key for key in entry if str(key).replace("-", "_") in GLOBAL_OPTIONS)
+        if global_keys:
+            raise ValueError(f"{where}: {', '.join(global_keys)} can only be set at the top level")
+        target_options = apply_options(parser, options, entry, LIST_OPTIONS, where)
+        output_dir = Path(target_options.output_dir)
+        if "output_dir" not in entry and "output-dir" not in entry:
+            output_dir = output_dir / name
+        try:
+            targets.append(make_target(target_options, name, url, output_dir))
+        except ValueError as exc:
+            raise ValueError(f"{where}: {exc}") from None
+
+    names = [target.name for target in targets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: target names must be unique")
+    return make_config(options, targets, path)
+
+
+@dataclass(frozen=True)
+class Shot:
+    """One image produced by a capture, before it is handed to the writer."""
+
+    name: str | None
+    data: bytes
+    processors: tuple[FrameProcessor, ...] = ()
+    viewport: dict[str, int] | None = None
+
+
 class StopLoop(Exception):
     """Signal to stop the snapshot loop."""
 
 
-def utc_stamp() -> str:
-    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%SZ")
+def utc_stamp(moment: datetime | None = None, millis: bool = False) -> str:
+    moment = moment or datetime.now(timezone.utc)
+    if millis:
+        return moment.strftime("%Y%m%d_%H%M%S_") + f"{moment.microsecond // 1000:03d}Z"
+    return moment.strftime("%Y%m%d_%H%M%SZ")
 
 
-def choose_wait_seconds(config: Config) -> float:
-    return random.uniform(config.min_minutes * 60.0, config.max_minutes * 60.0)
+def choose_wait_seconds(target: Target) -> float:
+    return random.uniform(target.min_minutes * 60.0, target.max_minutes * 60.0)
 
 
-def run(config: Config) -> None:
+def run(
+    config: Config,
+    source: ConfigSource | None = None,
+    on_capture: CaptureListener | None = None,
+) -> None:
     try:
-        from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright  # noqa: F401
     except ModuleNotFoundError as exc:
         raise SystemExit(
             "Missing dependency: playwright. Install with `pip install playwright` and `python -m playwright install chromium`."
         ) from exc
 
-    config.output_dir.mkdir(parents=True, exist_ok=True)
+    pump = configure_logging(
+        config.log_format,
+        config.log_file,
+        max_bytes=int(config.log_max_mb * 1024 * 1024),
+        backup_count=config.log_backups,
+    )
+    try:
+        asyncio.run(run_async(config, source, on_capture))
+    finally:
+        pump.close()
 
-    should_stop = False
 
-    def handle_signal(signum: int, _frame: object) -> None:
-        nonlocal should_stop
-        should_stop = True
-        print(f"Received signal {signum}; finishing current cycle then exiting...", flush=True)
+def run_workers(config: Config, count: int, source: ConfigSource | None = None) -> None:
+    """Run the targets on ``count`` worker processes, each via ``run``."""
+    try:
+        from playwright.async_api import async_playwright  # noqa: F401
+    except ModuleNotFoundError as exc:
+        raise SystemExit(
+            "Missing dependency: playwright. Install with `pip install playwright` and `python -m playwright install chromium`."
+        ) from exc
+
+    pump = configure_logging(
+        config.log_format,
+        config.log_file,
+        max_bytes=int(config.log_max_mb * 1024 * 1024),
+        backup_count=config.log_backups,
+    )
+    pool = WorkerPool(config, count, run, restart_needed, source)
+    stop = threading.Event()
+
+    def request_stop(signum: int, _frame: object) -> None:
+        if not stop.is_set():
+            logger.info(f"Received signal {signum}; stopping workers and exiting...")
+        stop.set()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, request_stop)
+    if source is not None and hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda _signum, _frame: pool.reload_requested.set())
+    try:
+        pool.serve(stop)
+    finally:
+        pool.close()
+        pump.close()
+
+
+class TargetRunner:
+    """Owns the browser context and page used to capture one target."""
+
+    def __init__(
+        self,
+        target: Target,
+        supervisor: BrowserSupervisor,
+        writer: FrameWriter,
+        metrics: CaptureMetrics,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        self.target = target
+        self.supervisor = supervisor
+        self.writer = writer
+        self.metrics = metrics
+        self.cache = cache
+        self.context = None
+        self.page = None
+        self.generation = 0
+        self.captures_in_context = 0
+        self.hangs = 0
+        self.crashed = False
+        self.captures_since_load = 0
+        self.last_digest = ""
+        self.unchanged_frames = 0
+        # The last frame kept by the latest screencast burst, None if it got none.
+        self.burst_frame: bytes | None = None
+        self.checks = build_checks(
+            selector=target.ready_selector,
+            expression=target.ready_js,
+            stable_frames=target.ready_stable_frames,
+            network_patterns=target.ready_network,
+            network_quiet_seconds=target.ready_network_quiet_seconds,
+        )
+        self.encoders: dict[str | None, TimelapseEncoder] = {}
+        self.dedupers: dict[str | None, FrameDeduper] = {}
+        self.status = "ok"
+        self.load_seconds: float | None = None
+        self.settle_seconds: float | None = None
+        self.screenshot_seconds = 0.0
+        # When the current capture was due, and how long it then waited for a slot.
+        self.due: float | None = None
+        self.queue_seconds = 0.0
+        self.screenshot_options = target.output_format.screenshot_options()
+        processor = target.output_format.processor()
+        self.processors = (processor,) if processor is not None else ()
+        self.blocker = None
+        if target.block_profile.enabled:
+            self.blocker = RequestBlocker(target.block_profile)
+        self.feed = self.feed_log = None
+        self.feed_responses: list[FeedResponse] = []
+        if target.feed_patterns:
+            self.feed = FeedRecorder(target.feed_patterns)
+            self.feed_log = FeedLog(target.output_dir / "feed")
+
+    def log(self, cycle: int, message: str, level: int = logging.INFO, **fields: object) -> None:
+        logger.log(level, message, extra={"target": self.target.name, "cycle": cycle, **fields})
+
+    async def open(self) -> None:
+        self.generation = self.supervisor.generation
+        self.captures_in_context = 0
+        self.context = await self.supervisor.browser.new_context(
+            viewport={"width": self.target.width, "height": self.target.height}
+        )
+        # The handler registered last runs first, so blocked requests never
+        # reach the cache.
+        if self.cache is not None:
+            await self.cache.install(self.context)
+        if self.blocker is not None:
+            await self.blocker.install(self.context)
+        self.page = await self.context.new_page()
+        self.page.on("crash", self.on_crash)
+        self.crashed = False
+        for check in self.checks:
+            check.attach(self.page)
+        if self.feed is not None:
+            self.feed.attach(self.page)
+        self.captures_since_load = 0
+
+    async def close(self) -> None:
+        context, self.context, self.page = self.context, None, None
+        await close_quietly(context)
+
+    def on_crash(self, page: object) -> None:
+        if page is self.page:
+            self.crashed = True
+
+    def needs_new_context(self, cycle: int) -> bool:
+        if self.page is None or self.page.is_closed():
+            return True
+        if self.crashed:
+            self.log(cycle, "Page crashed; opening a new browser context.", logging.WARNING)
+            return True
+        if self.generation != self.supervisor.generation:
+            return True
+        recycle_every = self.target.recycle_every
+        if recycle_every and self.captures_in_context >= recycle_every:
+            self.log(
+                cycle, f"Recycling browser context after {self.captures_in_context} captures."
+            )
+            return True
+        return False
+
+    async def load(self, cycle: int) -> None:
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        self.log(cycle, "Loading page...")
+        started = time.monotonic()
+        try:
+            await self.page.goto(
+                self.target.url, wait_until="networkidle", timeout=self.target.page_load_timeout_ms
+            )
+        except PlaywrightTimeoutError:
+            self.status = "load_timeout"
+            self.log(
+                cycle,
+                f"page load timed out after {self.target.page_load_timeout_ms} ms; "
+                "capturing anyway.",
+                logging.WARNING,
+                stage="navigation",
+                status=self.status,
+            )
+        if self.blocker is not None:
+            self.log(cycle, f"Blocked {self.blocker.take_count()} requests.")
+        if self.cache is not None:
+            hits, misses = self.cache.take_stats()
+            self.log(cycle, f"Asset cache: {hits} hits, {misses} misses.")
+        self.load_seconds = time.monotonic() - started
+
+        started = time.monotonic()
+        ready = await wait_until_ready(self.page, self.checks, self.target.settle_seconds)
+        self.settle_seconds = time.monotonic() - started
+        if self.checks:
+            waited = self.settle_seconds
+            if ready:
+                self.log(cycle, f"Ready after {waited:.2f}s.", stage="readiness", seconds=waited)
+            else:
+                if self.status == "ok":
+                    self.status = "not_ready"
+                pending = ", ".join(check.description for check in self.checks)
+                self.log(
+                    cycle,
+                    f"not ready ({pending}) after {waited:.2f}s; capturing anyway.",
+                    logging.WARNING,
+                    stage="readiness",
+                    status=self.status,
+                    seconds=waited,
+                )
+
+        self.captures_since_load = 0
+        self.last_digest = ""
+        self.unchanged_frames = 0
+
+    def needs_reload(self, cycle: int) -> bool:
+        target = self.target
+        if target.reload_every and self.captures_since_load >= target.reload_every:
+            self.log(cycle, f"Reloading after {self.captures_since_load} live captures.")
+            return True
+        if target.stale_frames and self.unchanged_frames >= target.stale_frames:
+            self.log(cycle, f"Page unchanged for {self.unchanged_frames} captures; reloading.")
+            return True
+        return False
+
+    def track_staleness(self, data: bytes | None) -> None:
+        """Count a live capture; ``data`` None means the page painted nothing new."""
+        digest = hashlib.sha1(data).hexdigest() if data is not None else self.last_digest
+        self.unchanged_frames = self.unchanged_frames + 1 if digest == self.last_digest else 0
+        self.last_digest = digest
+        self.captures_since_load += 1
+
+    async def shoot(self, cycle: int) -> list[Shot]:
+        crops = self.target.crops
+        if len(crops) <= 1:
+            options = dict(self.screenshot_options)
+            if crops:
+                clip = await resolve_clip(self.page, crops[0])
+                if clip is None:
+                    self.log(
+                        cycle, f"crop {crops[0].name!r} not found on page; skipped.",
+                        logging.WARNING,
+                    )
+                    return []
+                options["clip"] = clip
+            data = await self.page.screenshot(full_page=False, **options)
+            return [Shot(crops[0].name if crops else None, data, self.processors)]
+
+        # Several crops: render one lossless frame and cut every crop out of it
+        # on the writer threads, so all crops show exactly the same moment.
+        data = await self.page.screenshot(full_page=False, type="png")
+        shots = []
+        for crop in crops:
+            clip = await resolve_clip(self.page, crop)
+            if clip is None:
+                self.log(
+                    cycle, f"crop {crop.name!r} not found on page; skipped.", logging.WARNING
+                )
+                continue
+            shots.append(Shot(crop.name, data, (crop_processor(clip, self.target.output_format),)))
+        return shots
+
+    async def shoot_views(self, cycle: int) -> list[Shot]:
+        """Capture every view from the loaded page, then put the page back as it was."""
+        target = self.target
+        page = self.page
+        home = {"width": target.width, "height": target.height}
+        home_location = await page.evaluate("location.pathname + location.search + location.hash")
+        viewport, location = home, home_location
+        shots = []
+        try:
+            for view in target.views:
+                wanted = view.viewport(target.width, target.height)
+                changed = False
+                if wanted != viewport:
+                    await page.set_viewport_size(wanted)
+                    viewport, changed = wanted, True
+                if view.path is not None and view.path != location:
+                    await page.evaluate(target.view_script, view.navigation())
+                    location, changed = view.path, True
+                if changed:
+                    await wait_until_ready(page, self.checks, target.view_settle_seconds)
+                options = dict(self.screenshot_options)
+                if view.clip is not None:
+                    options["clip"] = view.clip_rect()
+                data = await page.screenshot(full_page=False, **options)
+                shots.append(Shot(view.name, data, self.processors, viewport))
+        finally:
+            # In live view the next capture reuses this page, so restore it.
+            if target.live and not page.is_closed():
+                moved = (viewport, location) != (home, home_location)
+                if viewport != home:
+                    await page.set_viewport_size(home)
+                if location != home_location:
+                    await page.evaluate(target.view_script, navigation(home_location))
+                if moved:
+                    await wait_until_ready(page, self.checks, target.view_settle_seconds)
+        return shots
+
+    async def timed_shoot(self, cycle: int) -> list[Shot]:
+        started = time.monotonic()
+        shots = await self.shoot(cycle)
+        if self.target.views:
+            shots += await self.shoot_views(cycle)
+        self.screenshot_seconds = time.monotonic() - started
+        return shots
+
+    async def screenshot(
+        self, cycle: int, shoot: Callable[[int], Awaitable[list[Shot]]] | None = None
+    ) -> list[Shot]:
+        """Get the page ready and run ``shoot`` (by default ``timed_shoot``) on it."""
+        shoot = shoot or self.timed_shoot
+        self.status = "ok"
+        self.load_seconds = self.settle_seconds = None
+        await self.supervisor.ensure_healthy()
+        async with self.supervisor.slot():
+            if self.due is not None:
+                self.queue_seconds = max(0.0, time.monotonic() - self.due)
+            if not self.target.live:
+                await self.open()
+                try:
+                    await self.load(cycle)
+                    shots = await shoot(cycle)
+                    await self.take_feed()
+                    return shots
+                finally:
+                    await self.close()
 
-    signal.signal(signal.SIGINT, handle_signal)
-    signal.signal(signal.SIGTERM, handle_signal)
+            if self.needs_new_context(cycle):
+                await self.close()
+                await self.open()
+                await self.load(cycle)
+            elif self.needs_reload(cycle):
+                await self.load(cycle)
 
-    print(f"Saving snapshots to: {config.output_dir.resolve()}", flush=True)
-    print(f"Target URL: {config.url}", flush=True)
-    print(
-        f"Interval: {config.min_minutes:g}-{config.max_minutes:g} minutes (randomized)",
-        flush=True,
+            shots = await shoot(cycle)
+            await self.take_feed()
+            self.captures_in_context += 1
+            if shots:
+                self.track_staleness(shots[0].data)
+            elif self.target.screencast_fps is not None:
+                # A burst hands its frames to the writer itself; its last one
+                # stands for the capture.
+                self.track_staleness(self.burst_frame)
+            return shots
+
+    async def take_feed(self) -> None:
+        if self.feed is not None:
+            self.feed_responses = await self.feed.take()
+
+    async def record_feed(self, cycle: int, frame: str, captured_at: float) -> None:
+        """Append the feed responses of this capture to the target's feed log."""
+        responses, self.feed_responses = self.feed_responses, []
+        if self.feed_log is None or not responses:
+            return
+        try:
+            size = await asyncio.to_thread(
+                self.feed_log.append, self.target.name, frame, captured_at, responses
+            )
+        except OSError as exc:
+            self.log(cycle, f"failed to record feed: {exc}", logging.ERROR, stage="feed")
+            return
+        self.log(
+            cycle, f"Recorded {len(responses)} feed response(s) ({size} bytes)",
+            logging.DEBUG, stage="feed", bytes=size,
+        )
+
+    def encoder_for(self, name: str | None) -> TimelapseEncoder | None:
+        settings = self.target.timelapse
+        if settings is None:
+            return None
+        if name not in self.encoders:
+            self.encoders[name] = TimelapseEncoder(
+                self.target.output_dir / (name or "") / "timelapse",
+                settings,
+                input_format=self.target.output_format.codec,
+                label=f"{self.target.name}:{name}" if name else self.target.name,
+            )
+        return self.encoders[name]
+
+    def deduper_for(self, name: str | None) -> FrameDeduper | None:
+        if self.target.dedupe is None:
+            return None
+        if name not in self.dedupers:
+            self.dedupers[name] = FrameDeduper(self.target.dedupe)
+        return self.dedupers[name]
+
+    def frame_key(self, moment: datetime, millis: bool = False) -> str:
+        """The frame's path under its stream folder: ``<shard>/fr24_<stamp><ext>``."""
+        target = self.target
+        filename = (
+            f"{DEFAULT_TARGET_NAME}_{utc_stamp(moment, millis)}{target.output_format.extension}"
+        )
+        return (shard_path(moment, target.layout) / filename).as_posix()
+
+    async def submit_shot(
+        self, cycle: int, shot: Shot, moment: datetime, key: str, timings: dict[str, float]
+    ) -> Path:
+        """Hand one image to the writer; the result is logged and fed to the timelapse."""
+        target = self.target
+        out_path = target.output_dir / (shot.name or "") / key
+        encoder = self.encoder_for(shot.name)
+        viewport = shot.viewport or {"width": target.width, "height": target.height}
+        record = FrameRecord(
+            target=target.name,
+            stream=shot.name or "",
+            captured_at=moment.timestamp(),
+            width=viewport["width"],
+            height=viewport["height"],
+            status=self.status,
+            load_seconds=self.load_seconds,
+            settle_seconds=self.settle_seconds,
+        )
+        written = await self.writer.submit(
+            out_path, shot.data, shot.processors, self.deduper_for(shot.name), record
+        )
+        # Only once the writer took the frame: a capture cancelled while waiting
+        # for it would leave a reserved number that is never added, stalling
+        # the timelapse behind it.
+        sequence = encoder.reserve() if encoder is not None else 0
+        written.add_done_callback(
+            functools.partial(
+                self.report_write, cycle, record, timings, out_path,
+                encoder=encoder, sequence=sequence,
+            )
+        )
+        return out_path
+
+    async def screencast(self, cycle: int, paths: list[Path]) -> list[Shot]:
+        """Record the page's screencast for ``screencast_seconds``, at most ``screencast_fps``.
+
+        Chromium sends a frame whenever the page repaints, stamped with the time
+        it was drawn; frames closer than the interval to the last kept one are
+        dropped. Kept frames go to the writer as they arrive and their paths are
+        appended to ``paths``, so this returns no shots.
+        """
+        from playwright.async_api import Error as PlaywrightError
+
+        target = self.target
+        streams = []
+        for crop in target.crops:
+            clip = await resolve_clip(self.page, crop)
+            if clip is None:
+                self.log(
+                    cycle, f"crop {crop.name!r} not found on page; skipped.", logging.WARNING
+                )
+                continue
+            streams.append((crop.name, (crop_processor(clip, target.output_format),)))
+        if not target.crops:
+            streams.append((None, self.processors))
+        if not streams:
+            return []
+
+        codec = "jpeg" if target.output_format.codec == "jpeg" else "png"
+        options = {
+            "format": codec,
+            "maxWidth": target.width,
+            "maxHeight": target.height,
+        }
+        if codec == "jpeg":
+            options["quality"] = target.output_format.effective_quality
+        frames: asyncio.Queue[dict] = asyncio.Queue()
+        session = await self.context.new_cdp_session(self.page)
+        session.on("Page.screencastFrame", frames.put_nowait)
+        interval = 1.0 / target.screencast_fps
+        next_due = 0.0
+        received = kept = 0
+        first: tuple[str, float] | None = None
+        self.burst_frame = None
+        started = time.monotonic()
+        deadline = started + target.screencast_seconds
+        await session.send("Page.startScreencast", options)
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    frame = await asyncio.wait_for(frames.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                received += 1
+                stamp = frame["metadata"].get("timestamp") or time.time()
+                if stamp >= next_due:
+                    # Stay on an even grid, but start a new one after a pause in painting.
+                    if stamp - next_due < interval:
+                        next_due += interval
+                    else:
+                        next_due = stamp + interval
+                    kept += 1
+                    moment = datetime.fromtimestamp(stamp, timezone.utc)
+                    key = self.frame_key(moment, millis=True)
+                    first = first or (key, stamp)
+                    data = self.burst_frame = base64.b64decode(frame["data"])
+                    for name, processors in streams:
+                        shot = Shot(name, data, processors)
+                        paths.append(await self.submit_shot(cycle, shot, moment, key, {}))
+                # Chromium sends the next frame only once this one is acknowledged,
+                # so a backed-up writer slows the stream instead of queueing frames.
+                await session.send("Page.screencastFrameAck", {"sessionId": frame["sessionId"]})
+        finally:
+            try:
+                await session.send("Page.stopScreencast")
+                await session.detach()
+            except PlaywrightError:
+                pass
+        self.screenshot_seconds = time.monotonic() - started
+        if received:
+            self.log(
+                cycle,
+                f"Screencast kept {kept} of {received} frames in {self.screenshot_seconds:.1f}s.",
+                stage="screenshot",
+            )
+        else:
+            self.log(
+                cycle, "Screencast got no frames; the page did not repaint.", logging.WARNING,
+                stage="screenshot",
+            )
+        if first is not None:
+            await self.take_feed()
+            await self.record_feed(cycle, *first)
+        return []
+
+    async def capture(self, cycle: int) -> list[Path]:
+        target = self.target
+        moment = datetime.now(timezone.utc)
+        paths: list[Path] = []
+        if target.screencast_fps is not None:
+            shots = await self.screenshot(cycle, functools.partial(self.screencast, paths=paths))
+        else:
+            shots = await self.screenshot(cycle)
+        timings = {"queue": self.queue_seconds, "screenshot": self.screenshot_seconds}
+        if self.load_seconds is not None:
+            timings["navigation"] = self.load_seconds
+        if self.settle_seconds is not None:
+            timings["readiness"] = self.settle_seconds
+        self.metrics.capture_completed(target.name, self.status, timings)
+        if target.screencast_fps is not None:
+            return paths
+
+        key = self.frame_key(moment)
+        await self.record_feed(cycle, key, moment.timestamp())
+        for shot in shots:
+            paths.append(await self.submit_shot(cycle, shot, moment, key, timings))
+        return paths
+
+    async def capture_guarded(self, cycle: int) -> list[Path]:
+        """Capture, recovering from hangs, page/context crashes and a dead browser.
+
+        A failed capture is retried once on a fresh context so a crash costs at
+        most a few seconds instead of a whole interval.
+        """
+        from playwright.async_api import Error as PlaywrightError
+
+        for attempt in (1, 2):
+            generation = self.supervisor.generation
+            try:
+                paths = await asyncio.wait_for(self.capture(cycle), self.target.watchdog_seconds)
+            except asyncio.TimeoutError:
+                self.metrics.capture_failed(self.target.name, "hang")
+                self.hangs += 1
+                self.log(
+                    cycle,
+                    f"capture hung for {self.target.watchdog_seconds:g}s "
+                    f"(attempt {attempt}); discarding the browser context.",
+                    logging.ERROR,
+                    reason="hang",
+                )
+            except PlaywrightError as exc:
+                self.metrics.capture_failed(self.target.name, "error")
+                self.log(
+                    cycle, f"capture failed (attempt {attempt}): {exc}", logging.ERROR,
+                    reason="error",
+                )
+            else:
+                self.hangs = 0
+                await self.supervisor.check_memory()
+                return paths
+
+            await self.close()
+            if self.hangs >= 2:
+                self.hangs = 0
+                await self.supervisor.restart(
+                    f"{self.target.name} hung twice in a row", generation
+                )
+            else:
+                await self.supervisor.ensure_healthy()
+        return []
+
+    def report_write(
+        self,
+        cycle: int,
+        record: FrameRecord,
+        timings: dict[str, float],
+        out_path: Path,
+        done: asyncio.Future,
+        *,
+        encoder: TimelapseEncoder | None = None,
+        sequence: int = 0,
+    ) -> None:
+        ok = not done.cancelled() and done.exception() is None
+        result = done.result() if ok else None
+        self.metrics.frame_written(
+            record.target, record.stream, cycle, record.status, timings, result
+        )
+        if encoder is not None:
+            # Duplicates still go into the timelapse so its timing stays even.
+            encoder.add(sequence, result.frame_path if result else None)
+        if done.cancelled():
+            return
+        if result is None:
+            self.log(
+                cycle, f"failed to write {out_path}: {done.exception()}", logging.ERROR,
+                stage="write", path=out_path,
+            )
+            return
+        details = {
+            "stage": "write",
+            "status": record.status,
+            "action": result.action,
+            "path": result.path,
+            "bytes": result.bytes_written,
+            "durations": {
+                **{stage: round(seconds, 4) for stage, seconds in timings.items()},
+                "encode": round(result.encode_seconds, 4),
+                "write": round(result.write_seconds, 4),
+            },
+        }
+        if result.duplicate_of is None:
+            self.log(cycle, f"Saved {result.path} ({result.bytes_written} bytes)", **details)
+        elif result.action == "skip":
+            self.log(cycle, f"Skipped duplicate of {result.duplicate_of.name}", **details)
+        else:
+            self.log(
+                cycle,
+                f"Saved {result.path} as {result.action} to {result.duplicate_of.name}",
+                **details,
+            )
+
+    def finish(self) -> None:
+        """Flush timelapse encoders; call once all writes have completed."""
+        for encoder in self.encoders.values():
+            encoder.close()
+        self.encoders.clear()
+        if self.feed_log is not None:
+            self.feed_log.close()
+
+
+def prepare_target(target: Target) -> None:
+    """Create the target's folder and check the optional dependencies it needs."""
+    target.output_dir.mkdir(parents=True, exist_ok=True)
+    if target.output_format.codec == "webp":
+        require_pillow("webp output", "webp")
+    if len(target.crops) > 1:
+        require_pillow("multiple crops")
+    elif target.crops and target.screencast_fps is not None:
+        # Screencast frames are always cropped with Pillow.
+        require_pillow("--crop with --screencast")
+    if target.timelapse is not None:
+        require_ffmpeg()
+    if target.dedupe is not None:
+        require_pillow("--dedupe")
+        if target.dedupe.max_diff is not None:
+            require_numpy("--dedupe-diff")
+
+
+def describe_target(target: Target) -> None:
+    mode = "live view" if target.live else "reload per capture"
+    if target.align_seconds:
+        interval = f"every {target.align_seconds / 60:g} minutes (aligned, {mode})"
+    else:
+        interval = (
+            f"every {target.min_minutes:g}-{target.max_minutes:g} minutes "
+            f"(randomized, {mode})"
+        )
+    logger.info(
+        f"{target.url} -> {target.output_dir.resolve()} {interval}",
+        extra={"target": target.name},
+    )
+
+
+def restart_needed(running: Config, loaded: Config) -> list[str]:
+    """Process-wide settings that differ between two configs; reloading cannot apply them."""
+    live_fields = {"targets", "config_file", "config_poll_seconds"}
+    return [
+        field.name
+        for field in fields(Config)
+        if field.name not in live_fields
+        and getattr(running, field.name) != getattr(loaded, field.name)
+    ]
+
+
+async def run_async(
+    config: Config,
+    source: ConfigSource | None = None,
+    on_capture: CaptureListener | None = None,
+) -> None:
+    from playwright.async_api import async_playwright
+
+    for target in config.targets:
+        prepare_target(target)
+
+    stop = asyncio.Event()
+    reload_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def request_stop(signum: int) -> None:
+        if not stop.is_set():
+            logger.info(f"Received signal {signum}; cancelling captures and exiting...")
+        stop.set()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, request_stop, signum)
+        except NotImplementedError:
+            # Windows event loops have no add_signal_handler.
+            signal.signal(
+                signum, lambda received, _frame: loop.call_soon_threadsafe(request_stop, received)
+            )
+    if source is not None and hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, reload_requested.set)
+
+    for target in config.targets:
+        describe_target(target)
+    logger.info(f"Capturing with up to {config.max_pages} concurrent page(s).")
+
+    cache = None
+    if config.cache_dir is not None:
+        cache = ResponseCache(
+            config.cache_dir,
+            max_bytes=int(config.cache_max_mb * 1024 * 1024),
+            default_ttl_seconds=config.cache_ttl_seconds,
+        )
+        logger.info(f"Caching static assets in {config.cache_dir.resolve()}")
+
+    if config.metrics_port is not None:
+        require_prometheus_client()
+    metrics = CaptureMetrics(
+        config.metrics_port, config.timing_log, host=config.metrics_host, on_capture=on_capture
     )
+    if config.metrics_port is not None:
+        logger.info(
+            f"Serving metrics on http://{config.metrics_host}:{config.metrics_port}/metrics"
+        )
+
+    index = FrameIndex(config.index_path) if config.index_path is not None else None
+    writer = FrameWriter(
+        workers=config.writer_threads, max_pending=config.max_pending_writes, index=index
+    )
+
+    async def until_stopped(awaitable: Awaitable[T], retired: asyncio.Event | None = None) -> T:
+        """Await ``awaitable`` unless a stop (or ``retired``) is requested first; then cancel it."""
+        events = [stop] if retired is None else [stop, retired]
+        if any(event.is_set() for event in events):
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise StopLoop
+        task = asyncio.ensure_future(awaitable)
+        waiters = [asyncio.ensure_future(event.wait()) for event in events]
+        try:
+            await asyncio.wait({task, *waiters}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        raise StopLoop
 
-    with sync_playwright() as playwright:
-        browser = playwright.chromium.launch(headless=config.headless)
-        context = browser.new_context(viewport={"width": config.width, "height": config.height})
-        page = context.new_page()
+    async def sleep_until(deadline: float, retired: asyncio.Event) -> None:
+        await until_stopped(asyncio.sleep(max(0.0, deadline - time.monotonic())), retired)
 
+    async def target_loop(runner: TargetRunner, retired: asyncio.Event) -> None:
+        target = runner.target
+        scheduler = None
+        if target.align_seconds:
+            scheduler = GridScheduler(target.align_seconds, target.align_offset_seconds)
         cycle = 0
+        deadline = time.monotonic()
         try:
             while True:
-                if should_stop:
-                    raise StopLoop
+                if scheduler is not None:
+                    tick = scheduler.next_tick()
+                    if tick.missed:
+                        runner.log(
+                            cycle,
+                            f"capture overran the grid; missed {tick.missed} tick(s).",
+                            logging.WARNING,
+                        )
+                    deadline = tick.deadline
+                    runner.log(
+                        cycle,
+                        "Next capture at "
+                        f"{datetime.fromtimestamp(tick.wall_time).strftime('%Y-%m-%d %H:%M:%S')}.",
+                    )
+                await sleep_until(deadline, retired)
 
                 cycle += 1
-                stamp = utc_stamp()
-                out_path = config.output_dir / f"fr24_{stamp}.png"
+                runner.due = deadline
+                # Retiring a target (config reload) lets its capture in progress finish.
+                await until_stopped(runner.capture_guarded(cycle))
 
-                print(f"[{cycle}] Loading page...", flush=True)
-                try:
-                    page.goto(config.url, wait_until="networkidle", timeout=config.page_load_timeout_ms)
-                except PlaywrightTimeoutError:
-                    print(
-                        f"[{cycle}] Warning: page load timed out after "
-                        f"{config.page_load_timeout_ms} ms; capturing anyway.",
-                        flush=True,
+                if scheduler is None:
+                    wait_seconds = choose_wait_seconds(target)
+                    deadline = time.monotonic() + wait_seconds
+                    wake_at = time.time() + wait_seconds
+                    runner.log(
+                        cycle,
+                        f"Sleeping for {wait_seconds/60:.2f} minutes "
+                        f"(until {datetime.fromtimestamp(wake_at).strftime('%Y-%m-%d %H:%M:%S')}).",
                     )
+        except StopLoop:
+            logger.info("Stopped.", extra={"target": target.name})
+        finally:
+            await runner.close()
+
+    async with async_playwright() as playwright:
+        # Every target shares one browser; the supervisor's slots bound how many
+        # captures (and, outside live view, how many contexts) run at once.
+        supervisor = BrowserSupervisor(
+            playwright,
+            headless=config.headless,
+            max_pages=config.max_pages,
+            max_rss_bytes=(
+                int(config.max_browser_rss_mb * 1024 * 1024)
+                if config.max_browser_rss_mb is not None
+                else None
+            ),
+        )
+        # Running targets by name: the runner, the event that retires it and its loop.
+        loops: dict[str, tuple[TargetRunner, asyncio.Event, asyncio.Task]] = {}
+        retiring: set[asyncio.Task] = set()
+        failed = loop.create_future()
+
+        def report_failure(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None and not failed.done():
+                failed.set_exception(task.exception())
+
+        def start(target: Target) -> None:
+            runner = TargetRunner(target, supervisor, writer, metrics, cache)
+            retired = asyncio.Event()
+            task = asyncio.create_task(target_loop(runner, retired))
+            task.add_done_callback(report_failure)
+            loops[target.name] = (runner, retired, task)
 
-                if config.settle_seconds > 0:
-                    time.sleep(config.settle_seconds)
+        async def finish_retired(runner: TargetRunner, task: asyncio.Task) -> None:
+            await asyncio.gather(task, return_exceptions=True)
+            await writer.drain()
+            await asyncio.to_thread(runner.finish)
 
-                page.screenshot(path=str(out_path), full_page=False)
-                print(f"[{cycle}] Saved {out_path}", flush=True)
+        def apply_config(loaded: Config) -> None:
+            nonlocal config
+            running = {target.name: target for target in config.targets}
+            wanted = {target.name: target for target in loaded.targets}
+            added = [name for name in wanted if name not in running]
+            changed = [name for name in wanted if name in running and wanted[name] != running[name]]
+            removed = [name for name in running if name not in wanted]
+            for name in added + changed:
+                prepare_target(wanted[name])
 
-                wait_seconds = choose_wait_seconds(config)
-                wake_at = time.time() + wait_seconds
-                print(
-                    f"[{cycle}] Sleeping for {wait_seconds/60:.2f} minutes "
-                    f"(until {datetime.fromtimestamp(wake_at).strftime('%Y-%m-%d %H:%M:%S')}).",
-                    flush=True,
+            for name in removed + changed:
+                runner, retired, task = loops.pop(name)
+                retired.set()
+                retirement = asyncio.create_task(finish_retired(runner, task))
+                retiring.add(retirement)
+                retirement.add_done_callback(retiring.discard)
+            for name in added + changed:
+                describe_target(wanted[name])
+                start(wanted[name])
+
+            ignored = restart_needed(config, loaded)
+            if ignored:
+                logger.warning(
+                    f"config reload: changes to {', '.join(ignored)} need a restart; ignored."
                 )
+            config = replace(loaded, **{name: getattr(config, name) for name in ignored})
+            logger.info(
+                f"Reloaded config: {len(added)} added, {len(changed)} changed, "
+                f"{len(removed)} removed."
+            )
 
-                while time.time() < wake_at:
-                    if should_stop:
-                        raise StopLoop
-                    time.sleep(min(1.0, wake_at - time.time()))
-        except StopLoop:
-            print("Stopped.", flush=True)
+        async def watch_config() -> None:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        reload_requested.wait(), config.config_poll_seconds or None
+                    )
+                except asyncio.TimeoutError:
+                    if not source.changed():
+                        continue
+                reload_requested.clear()
+                try:
+                    apply_config(await asyncio.to_thread(source.load))
+                # The require_* checks report missing dependencies with SystemExit.
+                except (ValueError, OSError, SystemExit) as exc:
+                    logger.error(f"config reload failed; keeping the running config: {exc}")
+
+        await supervisor.launch()
+        watcher = None
+        stopped = asyncio.ensure_future(stop.wait())
+        try:
+            for target in config.targets:
+                start(target)
+            if source is not None:
+                watcher = asyncio.create_task(watch_config())
+                watcher.add_done_callback(report_failure)
+            await asyncio.wait({stopped, failed}, return_when=asyncio.FIRST_COMPLETED)
+            if failed.done():
+                failed.result()
+            await asyncio.gather(*(task for _, _, task in loops.values()), *retiring)
+            await writer.drain()
+            for runner, _, _ in loops.values():
+                runner.finish()
+            logger.info("Stopped.")
         finally:
-            context.close()
-            browser.close()
+            stopped.cancel()
+            if watcher is not None:
+                watcher.cancel()
+            await supervisor.close()
+            writer.close()
+            metrics.close()
+            if index is not None:
+                index.close()
+            if cache is not None:
+                cache.close()
 
 
 def main() -> int:
-    config = parse_args()
-    run(config)
+    parser = build_parser()
+    args = parser.parse_args()
+    try:
+        config = load_config(args)
+    except (ValueError, OSError) as exc:
+        parser.error(str(exc))
+    source = None
+    if args.config:
+        source = FileConfigSource(Path(args.config), functools.partial(load_config, args))
+    count = max(1, min(config.workers or os.cpu_count() or 1, len(config.targets)))
+    if config.lease_db is not None:
+        store = LeaseStore(config.lease_db, config.lease_seconds)
+        source = LeaseConfigSource(config, store, config.node_id or default_node_id(), source)
+        # Targets are added as their leases are claimed.
+        config = replace(config, targets=())
+    try:
+        if config.workers is not None:
+            run_workers(config, count, source)
+        else:
+            run(config, source)
+    finally:
+        if config.lease_db is not None:
+            source.close()
     return 0
 
 
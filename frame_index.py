@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""SQLite index of every captured frame, plus a small query CLI.
+
+Usage:
+    python frame_index.py query snapshots/frames.sqlite3 --target fr24 \\
+        --since 2026-01-01T00:00 --until 2026-01-02T00:00
+    python frame_index.py summary snapshots/frames.sqlite3
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    captured_at REAL NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT,
+    action TEXT NOT NULL,
+    duplicate_of TEXT,
+    status TEXT NOT NULL,
+    load_seconds REAL,
+    settle_seconds REAL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_target_time ON frames (target, stream, captured_at);
+CREATE INDEX IF NOT EXISTS frames_time ON frames (captured_at);
+"""
+
+COLUMNS = (
+    "target", "stream", "captured_at", "path", "size", "sha256", "action", "duplicate_of",
+    "status", "load_seconds", "settle_seconds", "width", "height",
+)
+INSERT_SQL = (
+    f"INSERT INTO frames ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+)
+
+
+@dataclass(frozen=True)
+class FrameRecord:
+    """What the capture loop knows about a frame before it is written."""
+
+    target: str
+    stream: str
+    captured_at: float
+    width: int
+    height: int
+    status: str = "ok"
+    load_seconds: float | None = None
+    settle_seconds: float | None = None
+
+
+class FrameIndex:
+    """Thread-safe writer/reader for the frame index.
+
+    Paths are stored relative to the index file's directory when they are
+    inside it, so the archive and its index can be moved together.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.root = path.resolve().parent
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+    def relative(self, path: Path | None) -> str | None:
+        if path is None:
+            return None
+        resolved = path.resolve()
+        try:
+            return resolved.relative_to(self.root).as_posix()
+        except ValueError:
+            return str(resolved)
+
+    def absolute(self, stored: str) -> Path:
+        return self.root / stored
+
+    def add(
+        self,
+        record: FrameRecord,
+        path: Path,
+        size: int,
+        sha256: str | None,
+        action: str = "write",
+        duplicate_of: Path | None = None,
+    ) -> None:
+        row = (
+            record.target, record.stream, record.captured_at, self.relative(path), size, sha256,
+            action, self.relative(duplicate_of), record.status, record.load_seconds,
+            record.settle_seconds, record.width, record.height,
+        )
+        with self.lock, self.db:
+            self.db.execute(INSERT_SQL, row)
+
+    def query(
+        self,
+        target: str | None = None,
+        stream: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        include_duplicates: bool = True,
+        limit: int | None = None,
+    ) -> list[dict[str, object]]:
+        clauses = []
+        params: list[object] = []
+        for column, value in (("target", target), ("stream", stream)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("captured_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("captured_at < ?")
+            params.append(until)
+        if not include_duplicates:
+            clauses.append("duplicate_of IS NULL")
+        sql = f"SELECT {', '.join(COLUMNS)} FROM frames"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY captured_at, target, stream"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def summary(self) -> list[tuple[str, str, int, float, float, int]]:
+        with self.lock:
+            return self.db.execute(
+                "SELECT target, stream, COUNT(*), MIN(captured_at), MAX(captured_at), SUM(size) "
+                "FROM frames GROUP BY target, stream ORDER BY target, stream"
+            ).fetchall()
+
+    def update_paths(self, moves: dict[Path, Path]) -> int:
+        """Rewrite stored paths after files were moved; returns the number of rows changed."""
+        changed = 0
+        with self.lock, self.db:
+            # Without these every UPDATE below would scan the whole table.
+            self.db.execute("CREATE INDEX IF NOT EXISTS frames_path ON frames (path)")
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS frames_duplicate_of ON frames (duplicate_of)"
+            )
+            for old, new in moves.items():
+                old_stored, new_stored = self.relative(old), self.relative(new)
+                for column in ("path", "duplicate_of"):
+                    cursor = self.db.execute(
+                        f"UPDATE frames SET {column} = ? WHERE {column} = ?",
+                        (new_stored, old_stored),
+                    )
+                    changed += cursor.rowcount
+        return changed
+
+
+def parse_time(value: str) -> float:
+    """Parse ISO 8601 or the ``YYYYmmdd_HHMMSSZ`` file stamp; naive times are UTC."""
+    try:
+        moment = datetime.strptime(value, "%Y%m%d_%H%M%SZ")
+    except ValueError:
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"not a timestamp: {value!r}") from None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the frame index written by --index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query = commands.add_parser("query", help="List frames, oldest first.")
+    query.add_argument("index", type=Path, help="Index database file.")
+    query.add_argument("--target", help="Only this target.")
+    query.add_argument("--stream", help="Only this crop name ('' for full frames).")
+    query.add_argument("--since", type=parse_time, help="Start time (inclusive).")
+    query.add_argument("--until", type=parse_time, help="End time (exclusive).")
+    query.add_argument(
+        "--unique", action="store_true", help="Leave out frames recorded as duplicates."
+    )
+    query.add_argument("--limit", type=int, help="Return at most this many frames.")
+    query.add_argument(
+        "--format",
+        choices=("paths", "csv", "json"),
+        default="paths",
+        help="Output one path per line (default), CSV rows or JSON lines.",
+    )
+
+    summary = commands.add_parser("summary", help="Frame counts and time range per target.")
+    summary.add_argument("index", type=Path, help="Index database file.")
+
+    args = parser.parse_args()
+    if not args.index.exists():
+        parser.error(f"{args.index} does not exist.")
+    index = FrameIndex(args.index)
+    try:
+        if args.command == "summary":
+            for target, stream, count, first, last, size in index.summary():
+                label = f"{target}/{stream}" if stream else target
+                print(
+                    f"{label}: {count} frames, {format_time(first)} .. {format_time(last)}, "
+                    f"{size / 1024 / 1024:.1f} MiB"
+                )
+            return 0
+
+        rows = index.query(
+            target=args.target,
+            stream=args.stream,
+            since=args.since,
+            until=args.until,
+            include_duplicates=not args.unique,
+            limit=args.limit,
+        )
+        if args.format == "csv":
+            writer = csv.DictWriter(sys.stdout, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        elif args.format == "json":
+            for row in rows:
+                print(json.dumps(row))
+        else:
+            for row in rows:
+                stored = row["path"] if row["action"] not in ("skip", "ref") else row["duplicate_of"]
+                print(os.fspath(index.absolute(stored)))
+    except BrokenPipeError:
+        pass
+    finally:
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
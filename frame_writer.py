@@ -0,0 +1,180 @@
+"""Background pipeline that post-processes and writes captured frames."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Sequence
+
+from dedupe import FrameDeduper
+from frame_index import FrameIndex, FrameRecord
+
+FrameProcessor = Callable[[bytes], bytes]
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    """Outcome of one submitted frame.
+
+    ``duplicate_of`` is set when the frame matched an earlier one; ``action``
+    then says how it was stored: ``skip`` (nothing written), ``link`` (hard
+    link to the earlier file) or ``ref`` (a small ``.ref`` file naming it).
+    """
+
+    path: Path
+    bytes_written: int
+    duplicate_of: Path | None = None
+    action: str = "write"
+    encode_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def frame_path(self) -> Path:
+        """The file holding this frame's pixels."""
+        return self.duplicate_of if self.action in ("skip", "ref") else self.path
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` so that ``path`` is either absent or complete, never partial."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(data)
+    os.replace(tmp_path, path)
+
+
+def link_atomic(source: Path, path: Path) -> None:
+    """Hard-link ``path`` to ``source``, replacing any existing file atomically."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    os.link(source, tmp_path)
+    os.replace(tmp_path, path)
+
+
+class FrameWriter:
+    """Runs frame processors and file writes on a thread pool.
+
+    At most ``max_pending`` frames are held in memory; ``submit`` waits for a
+    free slot, which keeps a slow disk from letting captures pile up unbounded.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 16,
+        processors: Sequence[FrameProcessor] = (),
+        index: FrameIndex | None = None,
+    ) -> None:
+        self.index = index
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frame-writer")
+        self.slots = asyncio.Semaphore(max_pending)
+        self.processors = tuple(processors)
+        self.pending: set[asyncio.Future] = set()
+        # The last frame submitted for each deduplicated stream.
+        self.latest: dict[FrameDeduper, Future] = {}
+
+    def process_and_write(
+        self,
+        path: Path,
+        data: bytes,
+        processors: Sequence[FrameProcessor],
+        deduper: FrameDeduper | None,
+        record: FrameRecord | None,
+        before: Future | None = None,
+    ) -> WriteResult:
+        started = time.perf_counter()
+        for processor in self.processors + tuple(processors):
+            data = processor(data)
+        if before is not None:
+            # Match frames of a stream in the order they were submitted, each only
+            # once the one before is stored, so a duplicate never names a file that
+            # is later or not written yet. ``before`` was submitted to this FIFO
+            # pool earlier, so it is already running or done.
+            wait_futures([before])
+        previous = deduper.match(data, path) if deduper is not None else None
+        encoded = time.perf_counter()
+        result = self.store(path, data, previous, deduper)
+        result = replace(
+            result,
+            encode_seconds=encoded - started,
+            write_seconds=time.perf_counter() - encoded,
+        )
+        if self.index is not None and record is not None:
+            self.index.add(
+                record,
+                result.path,
+                result.bytes_written,
+                hashlib.sha256(data).hexdigest(),
+                result.action,
+                result.duplicate_of,
+            )
+        return result
+
+    def store(
+        self, path: Path, data: bytes, previous: Path | None, deduper: FrameDeduper | None
+    ) -> WriteResult:
+        if previous is None:
+            write_atomic(path, data)
+            return WriteResult(path, len(data))
+
+        action = deduper.settings.action
+        if action == "link":
+            try:
+                link_atomic(previous, path)
+            except OSError:
+                write_atomic(path, data)
+                return WriteResult(path, len(data))
+            return WriteResult(path, 0, previous, action)
+        if action == "ref":
+            ref = os.path.relpath(previous, path.parent).encode("utf-8") + b"\n"
+            ref_path = path.with_name(path.name + ".ref")
+            write_atomic(ref_path, ref)
+            return WriteResult(ref_path, len(ref), previous, action)
+        return WriteResult(path, 0, previous, action)
+
+    async def submit(
+        self,
+        path: Path,
+        data: bytes,
+        processors: Sequence[FrameProcessor] = (),
+        deduper: FrameDeduper | None = None,
+        record: FrameRecord | None = None,
+    ) -> asyncio.Future:
+        """Queue a frame for writing; the returned future resolves to a :class:`WriteResult`.
+
+        ``processors`` run after the writer-wide ones, for this frame only.
+        With a ``deduper`` the processed frame is compared against the stream's
+        last kept frame, in submission order, and duplicates are stored as the
+        deduper says. With a
+        ``record`` the stored frame is also added to the writer's index.
+        """
+        await self.slots.acquire()
+        before = self.latest.get(deduper) if deduper is not None else None
+        submitted = self.executor.submit(
+            self.process_and_write, path, data, processors, deduper, record, before
+        )
+        if deduper is not None:
+            self.latest[deduper] = submitted
+        future = asyncio.wrap_future(submitted)
+        self.pending.add(future)
+
+        def release(done: asyncio.Future) -> None:
+            self.pending.discard(done)
+            self.slots.release()
+
+        future.add_done_callback(release)
+        return future
+
+    async def drain(self) -> None:
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
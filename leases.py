@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""Sharing targets between snapshotter nodes through time-bounded leases in a SQLite file.
+
+Every node loads the same targets and points ``--lease-db`` at the same file.
+Each node claims up to its fair share of the targets, renews its leases while
+its event loop keeps running, and captures only what it holds. Leases of a
+node that dies expire and are claimed by the others.
+
+Usage:
+    python leases.py status /shared/snapshotter/leases.sqlite3
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+from config_file import ConfigSource
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    target TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    holder TEXT PRIMARY KEY,
+    seen REAL NOT NULL
+);
+"""
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseStore:
+    """Thread-safe access to the lease file.
+
+    Times are wall-clock seconds since the epoch, so nodes on different hosts
+    need roughly synchronised clocks; keep ``lease_seconds`` well above their
+    skew. The file stays in rollback-journal mode because WAL does not work on
+    network filesystems.
+    """
+
+    def __init__(self, path: Path, lease_seconds: float) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(
+            path, timeout=lease_seconds / 3, isolation_level=None, check_same_thread=False
+        )
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+    def sync(self, holder: str, names: Sequence[str], now: float | None = None) -> list[str]:
+        """Renew, claim and give up leases so ``holder`` has its share of ``names``.
+
+        The share is ``names`` divided evenly by the nodes seen within the
+        lease period; the remainder goes one each to the nodes first by id.
+        Held leases beyond it are released for newly joined nodes; free or
+        expired ones are claimed up to it. Returns the names held.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute(
+                    "INSERT INTO nodes (holder, seen) VALUES (?, ?) "
+                    "ON CONFLICT (holder) DO UPDATE SET seen = excluded.seen",
+                    (holder, now),
+                )
+                self.db.execute("DELETE FROM nodes WHERE seen < ?", (now - self.lease_seconds,))
+                nodes = [
+                    node for (node,) in self.db.execute("SELECT holder FROM nodes ORDER BY holder")
+                ]
+                share, remainder = divmod(len(names), len(nodes))
+                if nodes.index(holder) < remainder:
+                    share += 1
+                owners = {
+                    target: owner
+                    for target, owner in self.db.execute(
+                        "SELECT target, holder FROM leases WHERE expires >= ?", (now,)
+                    )
+                }
+                held = [name for name in names if owners.get(name) == holder][:share]
+                free = [name for name in names if name not in owners]
+                held += free[: share - len(held)]
+                self.db.execute(
+                    f"DELETE FROM leases WHERE holder = ? "
+                    f"AND target NOT IN ({', '.join('?' * len(held))})",
+                    (holder, *held),
+                )
+                self.db.executemany(
+                    "INSERT INTO leases (target, holder, expires) VALUES (?, ?, ?) "
+                    "ON CONFLICT (target) DO UPDATE "
+                    "SET holder = excluded.holder, expires = excluded.expires",
+                    [(name, holder, now + self.lease_seconds) for name in held],
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return held
+
+    def release(self, holder: str) -> None:
+        """Give up every lease of ``holder`` so other nodes can claim them right away."""
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM leases WHERE holder = ?", (holder,))
+            self.db.execute("DELETE FROM nodes WHERE holder = ?", (holder,))
+            self.db.execute("COMMIT")
+
+    def status(self) -> list[tuple[str, str, float]]:
+        with self.lock:
+            return self.db.execute(
+                "SELECT target, holder, expires FROM leases ORDER BY holder, target"
+            ).fetchall()
+
+
+class LeaseConfigSource(ConfigSource):
+    """The targets of ``config`` this node holds leases on.
+
+    Start the snapshotter with no targets; the first ``changed`` poll starts
+    a background thread that claims and then renews leases every third of the
+    lease period, and later polls pick up what it holds. Renewal stops when
+    ``changed`` is no longer polled, so a node whose event loop is stuck lets
+    its leases lapse. ``file_source``, if given, supplies reloads of the full
+    config.
+    """
+
+    def __init__(
+        self,
+        config: object,
+        store: LeaseStore,
+        node: str,
+        file_source: ConfigSource | None = None,
+    ) -> None:
+        self.config = config
+        self.store = store
+        self.node = node
+        self.file_source = file_source
+        self.held: frozenset[str] = frozenset()
+        self.applied: frozenset[str] = frozenset()
+        self.renewed_at = self.polled_at = time.monotonic()
+        self.stop = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    def current(self) -> object:
+        held = self.held
+        return replace(
+            self.config, targets=tuple(t for t in self.config.targets if t.name in held)
+        )
+
+    def refresh(self) -> None:
+        names = [target.name for target in self.config.targets]
+        try:
+            held = frozenset(self.store.sync(self.node, names))
+        except sqlite3.Error as exc:
+            expired = time.monotonic() - self.renewed_at > self.store.lease_seconds
+            if not expired:
+                logger.warning(f"could not renew leases: {exc}", extra={"reason": "lease"})
+                return
+            logger.error(
+                f"could not renew leases for {self.store.lease_seconds:g}s; "
+                f"dropping all targets: {exc}",
+                extra={"reason": "lease"},
+            )
+            held = frozenset()
+        else:
+            self.renewed_at = time.monotonic()
+        gained, lost = sorted(held - self.held), sorted(self.held - held)
+        if gained:
+            logger.info(f"Claimed {', '.join(gained)}.", extra={"action": "claim"})
+        if lost:
+            logger.info(f"Gave up {', '.join(lost)}.", extra={"action": "release"})
+        self.held = held
+
+    def renew(self) -> None:
+        interval = self.store.lease_seconds / 3
+        self.refresh()
+        while not self.stop.wait(interval):
+            if time.monotonic() - self.polled_at > self.store.lease_seconds:
+                if self.held:
+                    logger.error(
+                        f"no config poll for {self.store.lease_seconds:g}s; "
+                        "letting leases expire.",
+                        extra={"reason": "lease"},
+                    )
+                    self.held = frozenset()
+                continue
+            self.refresh()
+
+    def changed(self) -> bool:
+        self.polled_at = time.monotonic()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.renew, name="lease-renewer", daemon=True)
+            self.thread.start()
+        if self.file_source is not None and self.file_source.changed():
+            return True
+        return self.held != self.applied
+
+    def load(self) -> object:
+        if self.file_source is not None and self.file_source.changed():
+            self.config = self.file_source.load()
+            self.refresh()
+        self.applied = self.held
+        return self.current()
+
+    def close(self) -> None:
+        self.stop.set()
+        if self.thread is not None:
+            self.thread.join()
+        try:
+            self.store.release(self.node)
+        except sqlite3.Error as exc:
+            logger.warning(f"could not release leases: {exc}", extra={"reason": "lease"})
+        self.store.close()
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    path = Path(args.db)
+    if not path.exists():
+        print(f"No lease file at {path}", file=sys.stderr)
+        return 1
+    store = LeaseStore(path, lease_seconds=30.0)
+    try:
+        now = time.time()
+        for target, holder, expires in store.status():
+            until = datetime.fromtimestamp(expires, timezone.utc).strftime("%H:%M:%SZ")
+            state = f"until {until}" if expires >= now else "expired"
+            print(f"{target}\t{holder}\t{state}")
+    finally:
+        store.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    status = sub.add_parser("status", help="List every lease and its holder.")
+    status.add_argument("db")
+    status.set_defaults(func=cmd_status)
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
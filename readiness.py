@@ -0,0 +1,173 @@
+"""Readiness checks that decide when a loaded map page is worth capturing."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from fnmatch import fnmatch
+from typing import Sequence
+
+
+class ReadinessCheck:
+    """Base class for readiness checks.
+
+    ``attach`` is called once for every new page, before it navigates, so checks
+    that observe page events can start listening. ``wait`` returns once the page
+    is ready; callers bound it with a timeout.
+    """
+
+    description = "ready"
+
+    def attach(self, page: object) -> None:
+        pass
+
+    async def wait(self, page: object) -> None:
+        raise NotImplementedError
+
+
+class SelectorReady(ReadinessCheck):
+    def __init__(self, selector: str) -> None:
+        self.selector = selector
+        self.description = f"selector {selector!r}"
+
+    async def wait(self, page: object) -> None:
+        await page.wait_for_selector(self.selector, state="visible", timeout=0)
+
+
+class PredicateReady(ReadinessCheck):
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.description = f"predicate {expression!r}"
+
+    async def wait(self, page: object) -> None:
+        await page.wait_for_function(self.expression, timeout=0)
+
+
+class StableFramesReady(ReadinessCheck):
+    """Ready once ``frames`` consecutive downscaled screenshots are identical.
+
+    The frames are rendered by Chromium at ``scale`` of the viewport size
+    (DevTools ``Page.captureScreenshot`` with a scaled clip), so polling a
+    large viewport costs a fraction of a full screenshot.
+    """
+
+    def __init__(self, frames: int, interval_seconds: float = 0.5, scale: float = 0.25) -> None:
+        self.frames = frames
+        self.interval_seconds = interval_seconds
+        self.scale = scale
+        self.description = f"{frames} stable frames"
+
+    async def wait(self, page: object) -> None:
+        left, top, width, height = await page.evaluate(
+            "[visualViewport.pageLeft, visualViewport.pageTop, innerWidth, innerHeight]"
+        )
+        params = {
+            "format": "jpeg",
+            "quality": 40,
+            "clip": {"x": left, "y": top, "width": width, "height": height, "scale": self.scale},
+        }
+        session = await page.context.new_cdp_session(page)
+        try:
+            previous = ""
+            stable = 0
+            while stable < self.frames:
+                shot = await session.send("Page.captureScreenshot", params)
+                digest = hashlib.sha1(shot["data"].encode("ascii")).hexdigest()
+                stable = stable + 1 if digest == previous else 0
+                previous = digest
+                if stable < self.frames:
+                    await asyncio.sleep(self.interval_seconds)
+        finally:
+            await detach_quietly(session)
+
+
+async def detach_quietly(session: object) -> None:
+    """Detach a DevTools session, ignoring errors such as a page that already closed."""
+    try:
+        await session.detach()
+    except Exception:
+        pass
+
+
+class NetworkQuietReady(ReadinessCheck):
+    def __init__(self, patterns: Sequence[str], quiet_seconds: float) -> None:
+        self.patterns = tuple(patterns)
+        self.quiet_seconds = quiet_seconds
+        self.description = f"network quiet on {', '.join(self.patterns)}"
+        self.in_flight: set[object] = set()
+        self.last_activity = time.monotonic()
+
+    def matches(self, url: str) -> bool:
+        return any(fnmatch(url, pattern) for pattern in self.patterns)
+
+    def attach(self, page: object) -> None:
+        self.in_flight.clear()
+        self.last_activity = time.monotonic()
+        page.on("request", self.on_request)
+        page.on("requestfinished", self.on_done)
+        page.on("requestfailed", self.on_done)
+
+    def on_request(self, request: object) -> None:
+        if self.matches(request.url):
+            self.in_flight.add(request)
+            self.last_activity = time.monotonic()
+
+    def on_done(self, request: object) -> None:
+        if request in self.in_flight:
+            self.in_flight.discard(request)
+            self.last_activity = time.monotonic()
+
+    async def wait(self, page: object) -> None:
+        # Make sure at least one full quiet window passes after we start waiting,
+        # so a capture right after a reload does not see stale state.
+        self.last_activity = max(self.last_activity, time.monotonic())
+        while True:
+            idle_for = time.monotonic() - self.last_activity
+            if not self.in_flight and idle_for >= self.quiet_seconds:
+                return
+            await asyncio.sleep(max(0.05, self.quiet_seconds - idle_for))
+
+
+def build_checks(
+    selector: str | None = None,
+    expression: str | None = None,
+    stable_frames: int = 0,
+    network_patterns: Sequence[str] = (),
+    network_quiet_seconds: float = 0.5,
+) -> list[ReadinessCheck]:
+    checks: list[ReadinessCheck] = []
+    if network_patterns:
+        checks.append(NetworkQuietReady(network_patterns, network_quiet_seconds))
+    if selector:
+        checks.append(SelectorReady(selector))
+    if expression:
+        checks.append(PredicateReady(expression))
+    if stable_frames > 0:
+        checks.append(StableFramesReady(stable_frames))
+    return checks
+
+
+async def wait_until_ready(
+    page: object, checks: Sequence[ReadinessCheck], ceiling_seconds: float
+) -> bool:
+    """Run ``checks`` in order, giving up once ``ceiling_seconds`` have passed.
+
+    Returns True if every check passed in time. Without checks this is the
+    plain fixed sleep of ``ceiling_seconds``; with checks a ceiling of zero
+    means wait as long as it takes.
+    """
+    if not checks:
+        if ceiling_seconds > 0:
+            await asyncio.sleep(ceiling_seconds)
+        return True
+
+    async def run_checks() -> None:
+        for check in checks:
+            await check.wait(page)
+
+    try:
+        await asyncio.wait_for(run_checks(), timeout=ceiling_seconds or None)
+    except asyncio.TimeoutError:
+        return False
+    return True
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""Render timelapse frames from recorded aircraft positions, without a browser.
+
+Positions recorded with ``--record-feed`` are interpolated per flight to any
+frame interval and drawn, NumPy-vectorized, onto a basemap image that is
+reprojected once to the output view. Any size, map position and zoom can be
+rendered from the same recording.
+
+Usage:
+    python render_feed.py snapshots/feed --size 1920x1080 --center 52.8,-1.5/7 \\
+        --basemap basemap.png --basemap-center 52.8,-1.5/6 --step 10 \\
+        --output rendered --timelapse mp4 --fps 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from dedupe import require_numpy
+from encoders import EXTENSIONS, FORMATS, OutputFormat, require_pillow, save_image
+from feed_log import Position, fr24_positions, read_feed_log
+from frame_index import format_time, parse_time
+from timelapse import CONTAINERS, TimelapseEncoder, TimelapseSettings, require_ffmpeg
+from views import NUMBER
+
+logger = logging.getLogger(__name__)
+
+CENTER_RE = re.compile(rf"^(?P<lat>{NUMBER}),(?P<lon>{NUMBER})/(?P<zoom>{NUMBER})$")
+SIZE_RE = re.compile(r"^(?P<width>\d+)x(?P<height>\d+)$")
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+
+# Marker colour by altitude in feet, blended linearly between the stops.
+ALTITUDE_COLORS = (
+    (0, (255, 221, 0)),
+    (10000, (255, 153, 0)),
+    (25000, (230, 80, 60)),
+    (40000, (200, 60, 160)),
+)
+BACKGROUND = (24, 32, 44)
+
+
+@dataclass(frozen=True)
+class MapView:
+    """A Web Mercator view like the map's ``/LAT,LON/ZOOM`` path, ``width`` x ``height`` pixels."""
+
+    width: int
+    height: int
+    lat: float
+    lon: float
+    zoom: float
+
+    @property
+    def origin(self) -> tuple[float, float]:
+        """World pixel coordinates of the view's top-left corner."""
+        x, y = world_pixels(self.lat, self.lon, self.zoom)
+        return float(x) - self.width / 2, float(y) - self.height / 2
+
+    def project(self, lat: object, lon: object) -> tuple[object, object]:
+        """View pixel coordinates of arrays of latitudes and longitudes."""
+        x, y = world_pixels(lat, lon, self.zoom)
+        left, top = self.origin
+        return x - left, y - top
+
+
+def world_pixels(lat: object, lon: object, zoom: float) -> tuple[object, object]:
+    import numpy as np
+
+    size = TILE_SIZE * 2.0**zoom
+    phi = np.radians(np.clip(lat, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon) + 180.0) / 360.0 * size
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / math.pi) / 2.0 * size
+    return x, y
+
+
+def fit_view(width: int, height: int, lats: object, lons: object) -> MapView:
+    """The most zoomed-in view showing every position."""
+    import numpy as np
+
+    x, y = world_pixels(lats, lons, 0)
+    span_x = max(float(np.ptp(x)), 1e-9) * 1.1
+    span_y = max(float(np.ptp(y)), 1e-9) * 1.1
+    zoom = math.floor(math.log2(min(width / span_x, height / span_y)) * 4) / 4
+    middle_x, middle_y = (x.min() + x.max()) / 2, (y.min() + y.max()) / 2
+    lon = middle_x / TILE_SIZE * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * middle_y / TILE_SIZE))))
+    return MapView(width, height, lat, lon, zoom)
+
+
+def load_basemap(path: Path | None, source: MapView | None, view: MapView) -> object:
+    """The basemap resampled to ``view`` as an RGB array; a plain background without one."""
+    import numpy as np
+    from PIL import Image
+
+    if path is None:
+        return np.full((view.height, view.width, 3), BACKGROUND, dtype=np.uint8)
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        if source is None:
+            source = MapView(image.width, image.height, view.lat, view.lon, view.zoom)
+        elif (source.width, source.height) != image.size:
+            source = MapView(image.width, image.height, source.lat, source.lon, source.zoom)
+        # Output pixel -> basemap pixel: undo the zoom difference, then shift origins.
+        scale = 2.0 ** (source.zoom - view.zoom)
+        (view_left, view_top), (source_left, source_top) = view.origin, source.origin
+        resampled = image.transform(
+            (view.width, view.height),
+            Image.Transform.AFFINE,
+            (scale, 0, view_left * scale - source_left, 0, scale, view_top * scale - source_top),
+            resample=Image.Resampling.BILINEAR,
+            fillcolor=BACKGROUND,
+        )
+    return np.asarray(resampled).copy()
+
+
+class Tracks:
+    """Recorded positions as straight segments between consecutive fixes of each flight.
+
+    Fixes further apart than ``max_gap`` seconds are not joined; a flight's
+    last fix before a gap is held in place for ``hold`` seconds.
+    """
+
+    def __init__(
+        self, positions: Iterable[Position], view: MapView, max_gap: float, hold: float
+    ) -> None:
+        import numpy as np
+
+        rows = {}
+        flights: dict[str, int] = {}
+        for position in positions:
+            flight = flights.setdefault(position.flight_id, len(flights))
+            rows[flight, position.timestamp] = (
+                position.lat, position.lon, position.track, position.altitude_ft,
+            )
+        keys = sorted(rows)
+        flight = np.array([key[0] for key in keys], dtype=np.int64)
+        t = np.array([key[1] for key in keys], dtype=np.float64)
+        values = np.array([rows[key] for key in keys], dtype=np.float64).reshape(-1, 4)
+        lat, lon, track, altitude = values.T
+        x, y = view.project(lat, lon)
+
+        joined = np.zeros(len(t), dtype=bool)
+        joined[:-1] = (flight[1:] == flight[:-1]) & (t[1:] - t[:-1] <= max_gap)
+        following = np.minimum(np.arange(len(t)) + 1, max(len(t) - 1, 0))
+        order = np.argsort(t, kind="stable")
+        self.t0 = t[order]
+        self.t1 = np.where(joined, t[following], t + hold)[order]
+        self.x0, self.y0 = x[order], y[order]
+        self.x1 = np.where(joined, x[following], x)[order]
+        self.y1 = np.where(joined, y[following], y)[order]
+        self.track = np.radians(track[order])
+        self.altitude = altitude[order]
+        self.longest = max(max_gap, hold)
+        self.flights = len(flights)
+
+    def __len__(self) -> int:
+        return len(self.t0)
+
+    @property
+    def start(self) -> float:
+        return float(self.t0[0])
+
+    @property
+    def end(self) -> float:
+        return float(self.t1.max())
+
+    def at(self, moment: float) -> tuple[object, object, object, object]:
+        """Interpolated pixel positions, headings and altitudes of every flight at ``moment``."""
+        import numpy as np
+
+        first = np.searchsorted(self.t0, moment - self.longest, side="left")
+        last = np.searchsorted(self.t0, moment, side="right")
+        window = slice(first, last)
+        active = self.t1[window] > moment
+        t0, t1 = self.t0[window][active], self.t1[window][active]
+        fraction = (moment - t0) / (t1 - t0)
+        x0, y0 = self.x0[window][active], self.y0[window][active]
+        x = x0 + fraction * (self.x1[window][active] - x0)
+        y = y0 + fraction * (self.y1[window][active] - y0)
+        return x, y, self.track[window][active], self.altitude[window][active]
+
+
+def marker_offsets(size: float) -> tuple[object, object]:
+    """Points filling an arrowhead pointing up, sampled densely enough to rotate without holes."""
+    import numpy as np
+
+    steps = np.arange(-size, size + 0.5, 0.5)
+    dx, dy = (grid.ravel() for grid in np.meshgrid(steps, steps))
+    # Apex at (0, -size), base corners at (+-0.7 size, size), notched at the tail.
+    half_width = 0.7 * size * (dy + size) / (2 * size)
+    inside = (np.abs(dx) <= half_width) & (dy <= size - 0.6 * np.abs(dx))
+    return dx[inside], dy[inside]
+
+
+def altitude_colors(altitude: object) -> object:
+    import numpy as np
+
+    stops = [stop for stop, _color in ALTITUDE_COLORS]
+    channels = [
+        np.interp(altitude, stops, [color[channel] for _stop, color in ALTITUDE_COLORS])
+        for channel in range(3)
+    ]
+    return np.stack(channels, axis=-1).astype(np.uint8)
+
+
+def draw_markers(
+    frame: object, x: object, y: object, heading: object, altitude: object, offsets: object
+) -> None:
+    """Stamp one rotated marker per aircraft into ``frame`` in place."""
+    import numpy as np
+
+    dx, dy = offsets
+    cos, sin = np.cos(heading)[:, None], np.sin(heading)[:, None]
+    # Headings are clockwise from north; image y grows downwards.
+    xs = np.rint(x[:, None] + dx * cos - dy * sin).astype(np.int64)
+    ys = np.rint(y[:, None] + dx * sin + dy * cos).astype(np.int64)
+    height, width = frame.shape[:2]
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    colors = np.broadcast_to(altitude_colors(altitude)[:, None, :], (*xs.shape, 3))
+    frame[ys[inside], xs[inside]] = colors[inside]
+
+
+def render_frame(
+    basemap: object, tracks: Tracks, moment: float, offsets: object
+) -> object:
+    frame = basemap.copy()
+    x, y, heading, altitude = tracks.at(moment)
+    draw_markers(frame, x, y, heading, altitude, offsets)
+    return frame
+
+
+def encode_frame(frame: object, path: Path, output_format: OutputFormat) -> Path:
+    from PIL import Image
+
+    path.write_bytes(save_image(Image.fromarray(frame), output_format))
+    return path
+
+
+def read_positions(paths: Sequence[Path]) -> list[Position]:
+    logs = []
+    for path in paths:
+        logs.extend(sorted(path.glob("*.feedlog")) if path.is_dir() else [path])
+    positions = []
+    for log in logs:
+        for entry in read_feed_log(log):
+            positions.extend(fr24_positions(entry))
+    return positions
+
+
+def parse_center(value: str) -> tuple[float, float, float]:
+    match = CENTER_RE.match(value)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"expected LAT,LON/ZOOM, got {value!r}")
+    return float(match["lat"]), float(match["lon"]), float(match["zoom"])
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    match = SIZE_RE.match(value)
+    if match is None or int(match["width"]) == 0 or int(match["height"]) == 0:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    return int(match["width"]), int(match["height"])
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Render frames from positions recorded with --record-feed."
+    )
+    parser.add_argument(
+        "logs", nargs="+", type=Path, help="Feed log files, or folders of *.feedlog files."
+    )
+    parser.add_argument("--output", type=Path, required=True, help="Folder for the frames.")
+    parser.add_argument(
+        "--size", type=parse_size, default=(1920, 1080), help="Frame size (default: 1920x1080)."
+    )
+    parser.add_argument(
+        "--center",
+        type=parse_center,
+        help=(
+            "Map position of the frames as LAT,LON/ZOOM (default: the basemap's, or one "
+            "that fits every position)."
+        ),
+    )
+    parser.add_argument("--basemap", type=Path, help="Background image, e.g. a captured frame.")
+    parser.add_argument(
+        "--basemap-center",
+        type=parse_center,
+        help="Map position of --basemap as LAT,LON/ZOOM (default: the same as --center).",
+    )
+    parser.add_argument(
+        "--step",
+        type=float,
+        default=10.0,
+        help="Seconds of recorded time between frames (default: 10).",
+    )
+    parser.add_argument("--start", type=parse_time, help="First frame time (default: first fix).")
+    parser.add_argument("--end", type=parse_time, help="Last frame time (default: last fix).")
+    parser.add_argument(
+        "--max-gap",
+        type=float,
+        default=600.0,
+        help="Join fixes of a flight at most this many seconds apart (default: 600).",
+    )
+    parser.add_argument(
+        "--hold",
+        type=float,
+        default=60.0,
+        help="Keep drawing a flight this long after its last fix (default: 60).",
+    )
+    parser.add_argument(
+        "--marker-size", type=float, default=6.0, help="Aircraft marker radius in pixels."
+    )
+    parser.add_argument("--format", choices=FORMATS, default="png", help="Frame image format.")
+    parser.add_argument("--quality", type=int, help="JPEG/WebP quality.")
+    parser.add_argument(
+        "--threads", type=int, default=4, help="Threads encoding and writing frames (default: 4)."
+    )
+    parser.add_argument(
+        "--timelapse", choices=CONTAINERS, help="Also encode the frames into video segments."
+    )
+    parser.add_argument("--fps", type=float, default=30.0, help="Timelapse frame rate.")
+    return parser
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.step <= 0 or args.max_gap <= 0 or args.hold < 0 or args.threads < 1:
+        parser.error("--step, --max-gap and --threads must be positive and --hold not negative.")
+    require_numpy("render_feed.py")
+    require_pillow("render_feed.py")
+    if args.timelapse:
+        require_ffmpeg()
+
+    positions = read_positions(args.logs)
+    if not positions:
+        parser.error("no Flightradar24 positions in the given feed logs.")
+    width, height = args.size
+    if args.center is not None:
+        view = MapView(width, height, *args.center)
+    elif args.basemap_center is not None:
+        view = MapView(width, height, *args.basemap_center)
+    else:
+        view = fit_view(
+            width,
+            height,
+            [position.lat for position in positions],
+            [position.lon for position in positions],
+        )
+    source = MapView(0, 0, *args.basemap_center) if args.basemap_center else None
+    basemap = load_basemap(args.basemap, source, view)
+    tracks = Tracks(positions, view, args.max_gap, args.hold)
+    offsets = marker_offsets(args.marker_size)
+    output_format = OutputFormat(codec=args.format, quality=args.quality)
+
+    start = args.start if args.start is not None else tracks.start
+    end = args.end if args.end is not None else tracks.end
+    count = int((end - start) // args.step) + 1
+    if count < 1:
+        parser.error("--end is before --start.")
+    logger.info(
+        f"Rendering {count} frames of {tracks.flights} flights ({len(tracks)} fixes), "
+        f"{format_time(start)} .. {format_time(end)}, "
+        f"at {view.lat:.4f},{view.lon:.4f}/{view.zoom:g}"
+    )
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    encoder = None
+    if args.timelapse:
+        encoder = TimelapseEncoder(
+            args.output / "timelapse",
+            TimelapseSettings(container=args.timelapse, fps=args.fps),
+            input_format=args.format,
+            label="render",
+        )
+    started = time.monotonic()
+    with ThreadPoolExecutor(args.threads, thread_name_prefix="render-writer") as executor:
+        pending = []
+        for number in range(count):
+            moment = start + number * args.step
+            frame = render_frame(basemap, tracks, moment, offsets)
+            path = args.output / f"frame_{number:06d}{EXTENSIONS[args.format]}"
+            written = executor.submit(encode_frame, frame, path, output_format)
+            if encoder is not None:
+                sequence = encoder.reserve()
+                written.add_done_callback(
+                    lambda done, sequence=sequence: encoder.add(
+                        sequence, None if done.exception() else done.result()
+                    )
+                )
+            pending.append(written)
+            # Bound the frames held in memory to a few per thread.
+            if len(pending) >= 4 * args.threads:
+                pending.pop(0).result()
+        for written in pending:
+            written.result()
+    if encoder is not None:
+        encoder.close()
+    elapsed = time.monotonic() - started
+    logger.info(f"Rendered {count} frames in {elapsed:.1f}s ({count / elapsed:.1f} frames/s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Disk-backed HTTP response cache plugged into browser contexts via request routing.
+
+Entries live under a cache directory as one body file each plus a small SQLite
+index, so they survive restarts. The cache is bounded by total body size and
+evicts the least recently used entries first. Disk access runs in worker
+threads, so it never holds up the event loop the captures share.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Mapping, Sequence
+
+CACHEABLE_TYPES = frozenset({"script", "stylesheet", "image", "font"})
+
+# Headers that describe the encoded transfer rather than the body we store.
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+# Hits update last_used in memory; they are written out in batches.
+TOUCH_BATCH = 64
+TOUCH_FLUSH_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS vary (
+    url TEXT PRIMARY KEY,
+    names TEXT NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+class ResponseCache:
+    """Thread-safe; the ``async`` route handler does its disk access in worker threads."""
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        default_ttl_seconds: float,
+        resource_types: frozenset[str] = CACHEABLE_TYPES,
+        url_patterns: Sequence[str] = (),
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl_seconds = default_ttl_seconds
+        self.resource_types = resource_types
+        self.url_patterns = tuple(url_patterns)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self.touched: dict[str, float] = {}
+        self.flushed_at = time.monotonic()
+
+        (directory / "bodies").mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(directory / "index.sqlite3", check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.total_bytes = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.flush_touches()
+            self.db.close()
+
+    def flush_touches(self) -> None:
+        if self.touched:
+            with self.db:
+                self.db.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(used, key) for key, used in self.touched.items()],
+                )
+            self.touched.clear()
+        self.flushed_at = time.monotonic()
+
+    def body_path(self, key: str) -> Path:
+        return self.directory / "bodies" / key[:2] / key
+
+    def is_cacheable(self, method: str, url: str, resource_type: str) -> bool:
+        if method != "GET":
+            return False
+        if self.url_patterns:
+            return any(fnmatch(url, pattern) for pattern in self.url_patterns)
+        return resource_type in self.resource_types
+
+    def vary_names(self, url: str) -> list[str]:
+        with self.lock:
+            row = self.db.execute("SELECT names FROM vary WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    @staticmethod
+    def make_key(url: str, vary_names: Sequence[str], request_headers: Mapping[str, str]) -> str:
+        parts = [url] + [f"{name}={request_headers.get(name, '')}" for name in vary_names]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def ttl_for(self, headers: Mapping[str, str]) -> float | None:
+        """Seconds to keep a response, or None if it must not be stored."""
+        cache_control = headers.get("cache-control", "").lower()
+        # Entries are never revalidated, so no-cache is as good as no-store.
+        if (
+            "no-store" in cache_control
+            or "no-cache" in cache_control
+            or headers.get("vary", "").strip() == "*"
+        ):
+            return None
+        match = MAX_AGE_RE.search(cache_control)
+        if match:
+            return float(match.group(1)) or None
+        return self.default_ttl_seconds
+
+    def get(self, url: str, request_headers: Mapping[str, str]) -> CachedResponse | None:
+        key = self.make_key(url, self.vary_names(url), request_headers)
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, headers, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        now = time.time()
+        if row is None or row[2] < now:
+            if row is not None:
+                self.delete(key)
+            with self.lock:
+                self.misses += 1
+            return None
+        try:
+            body = self.body_path(key).read_bytes()
+        except FileNotFoundError:
+            self.delete(key)
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+            self.touched[key] = now
+            if (
+                len(self.touched) >= TOUCH_BATCH
+                or time.monotonic() - self.flushed_at > TOUCH_FLUSH_SECONDS
+            ):
+                self.flush_touches()
+        return CachedResponse(status=row[0], headers=json.loads(row[1]), body=body)
+
+    def put(
+        self,
+        url: str,
+        request_headers: Mapping[str, str],
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> bool:
+        headers = {name.lower(): value for name, value in headers.items()}
+        ttl = self.ttl_for(headers)
+        if status != 200 or ttl is None or len(body) > self.max_bytes:
+            return False
+
+        vary_names = sorted(
+            name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()
+        )
+        key = self.make_key(url, vary_names, request_headers)
+        stored_headers = {k: v for k, v in headers.items() if k not in DROPPED_HEADERS}
+
+        path = self.body_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(body)
+        tmp_path.replace(path)
+
+        now = time.time()
+        with self.lock:
+            with self.db:
+                previous = self.db.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                self.db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, status, json.dumps(stored_headers), len(body), now + ttl, now),
+                )
+                self.db.execute(
+                    "INSERT OR REPLACE INTO vary VALUES (?, ?)", (url, json.dumps(vary_names))
+                )
+            self.touched.pop(key, None)
+            self.total_bytes += len(body) - (previous[0] if previous else 0)
+            self.evict()
+        return True
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            with self.db:
+                row = self.db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.touched.pop(key, None)
+            if row:
+                self.total_bytes -= row[0]
+            self.body_path(key).unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        with self.lock:
+            if self.total_bytes <= self.max_bytes:
+                return
+            self.flush_touches()
+            now = time.time()
+            expired = self.db.execute(
+                "SELECT key FROM entries WHERE expires_at < ?", (now,)
+            ).fetchall()
+            for (key,) in expired:
+                self.delete(key)
+            while self.total_bytes > self.max_bytes:
+                rows = self.db.execute(
+                    "SELECT key FROM entries ORDER BY last_used LIMIT 64"
+                ).fetchall()
+                if not rows:
+                    break
+                for (key,) in rows:
+                    self.delete(key)
+                    if self.total_bytes <= self.max_bytes:
+                        break
+
+    async def install(self, context: object) -> None:
+        await context.route("**/*", self.handle)
+
+    async def handle(self, route: object) -> None:
+        request = route.request
+        if not self.is_cacheable(request.method, request.url, request.resource_type):
+            await route.fallback()
+            return
+
+        request_headers = {name.lower(): value for name, value in request.headers.items()}
+        cached = await asyncio.to_thread(self.get, request.url, request_headers)
+        if cached is not None:
+            await route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+            return
+
+        try:
+            response = await route.fetch()
+            body = await response.body()
+        except Exception:
+            # Let the browser make (and fail) the request itself.
+            await route.fallback()
+            return
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        await route.fulfill(status=response.status, headers=headers, body=body)
+        # Stored after the page got the response, so the write never delays it.
+        await asyncio.to_thread(
+            self.put, request.url, request_headers, response.status, response.headers, body
+        )
+
+    def take_stats(self) -> tuple[int, int]:
+        with self.lock:
+            stats = (self.hits, self.misses)
+            self.hits = self.misses = 0
+        return stats
@@ -0,0 +1,71 @@
+"""Drift-free capture scheduling on a fixed wall-clock grid."""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Tick:
+    """``deadline`` is on the monotonic clock; ``wall_time`` is the grid mark as a Unix time.
+
+    ``missed`` counts grid marks skipped since the previous tick because a
+    capture overran them.
+    """
+
+    deadline: float
+    wall_time: float
+    missed: int
+
+
+class GridScheduler:
+    """Yields ticks on multiples of ``interval`` seconds of wall-clock time (plus ``offset``).
+
+    The grid is anchored to the wall clock once and then followed with the
+    monotonic clock, so capture duration never shifts later ticks and clock
+    adjustments do not make sleeps jump. If the wall clock is stepped by more
+    than ``resync_seconds`` the anchor is refreshed so ticks stay on the marks.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        offset: float = 0.0,
+        resync_seconds: float = 1.0,
+        monotonic: Callable[[], float] = time.monotonic,
+        wall: Callable[[], float] = time.time,
+    ) -> None:
+        self.interval = interval
+        self.offset = offset % interval
+        self.resync_seconds = resync_seconds
+        self.monotonic = monotonic
+        self.wall = wall
+        self.anchor()
+        self.last_index: int | None = None
+
+    def anchor(self) -> None:
+        self.anchor_monotonic = self.monotonic()
+        self.anchor_wall = self.wall()
+
+    def wall_now(self) -> float:
+        return self.anchor_wall + (self.monotonic() - self.anchor_monotonic)
+
+    def next_tick(self) -> Tick:
+        if abs(self.wall() - self.wall_now()) > self.resync_seconds:
+            self.anchor()
+            # Marks skipped by a clock step were not overrun by a capture.
+            self.last_index = None
+
+        now = self.wall_now()
+        index = math.floor((now - self.offset) / self.interval) + 1
+        missed = 0
+        if self.last_index is not None:
+            missed = max(0, index - self.last_index - 1)
+        self.last_index = index
+
+        wall_time = index * self.interval + self.offset
+        deadline = self.anchor_monotonic + (wall_time - self.anchor_wall)
+        return Tick(deadline=deadline, wall_time=wall_time, missed=missed)
@@ -0,0 +1,165 @@
+"""Structured logging: JSON lines or human-readable console output, written off the event loop.
+
+Modules log through the standard ``logging`` package and attach structured
+fields with ``extra``::
+
+    logger.info("Saved frame", extra={"target": "fr24", "cycle": 3, "stage": "write"})
+
+``configure_logging`` routes every record through a queue to a background
+thread, which formats and writes it. Handlers there only flush when the queue
+runs empty, so a burst of lines from many targets costs one flush instead of
+one per line.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TextIO
+
+LOG_FORMATS = ("console", "json")
+
+# ``extra`` keys copied into JSON records, in this order.
+FIELDS = (
+    "target", "cycle", "stage", "status", "action", "path", "bytes", "reason", "seconds",
+    "durations",
+)
+
+LEVEL_PREFIXES = {logging.WARNING: "Warning: ", logging.ERROR: "Error: "}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, object] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname.lower(),
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = str(value) if isinstance(value, Path) else value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """``[target:cycle] message``, as the snapshotter has always printed it."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = LEVEL_PREFIXES.get(record.levelno, "") + record.getMessage()
+        target = getattr(record, "target", None)
+        cycle = getattr(record, "cycle", None)
+        if target is not None and cycle is not None:
+            message = f"[{target}:{cycle}] {message}"
+        elif target is not None:
+            message = f"[{target}] {message}"
+        if record.exc_info:
+            message += "\n" + self.formatException(record.exc_info)
+        return message
+
+
+class BufferedStreamHandler(logging.StreamHandler):
+    """Stream handler that leaves flushing to ``sync``."""
+
+    def flush(self) -> None:
+        pass
+
+    def sync(self) -> None:
+        super().flush()
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Size-rotated log file that leaves flushing to ``sync`` (rotation flushes too)."""
+
+    def flush(self) -> None:
+        pass
+
+    def sync(self) -> None:
+        super().flush()
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Queue records as they are, keeping ``args`` and ``exc_info`` for the formatters."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class LogPump:
+    """Background thread that writes queued records and flushes once the queue is empty."""
+
+    def __init__(self, handlers: list[logging.Handler]) -> None:
+        self.handlers = handlers
+        self.queue: queue.SimpleQueue[logging.LogRecord | None] = queue.SimpleQueue()
+        self.queue_handler = QueueHandler(self.queue)
+        self.thread = threading.Thread(target=self.run, name="log-pump", daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            if self.queue.empty():
+                self.sync()
+        self.sync()
+
+    def sync(self) -> None:
+        for handler in self.handlers:
+            try:
+                handler.sync()
+            except Exception:
+                handler.handleError(None)
+
+    def close(self) -> None:
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.queue.put(None)
+        self.thread.join()
+        for handler in self.handlers:
+            handler.close()
+
+
+def configure_logging(
+    console_format: str = "console",
+    log_file: Path | None = None,
+    max_bytes: int = 50 * 1024 * 1024,
+    backup_count: int = 5,
+    stream: TextIO | None = None,
+    level: int = logging.INFO,
+) -> LogPump:
+    """Log to ``stream`` (stdout by default) and optionally to a rotated JSON-lines file.
+
+    Returns the pump; call its ``close`` before exiting so buffered lines are
+    written.
+    """
+    console = BufferedStreamHandler(stream or sys.stdout)
+    console.setFormatter(JsonFormatter() if console_format == "json" else ConsoleFormatter())
+    handlers: list[logging.Handler] = [console]
+    if log_file is not None:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = BufferedRotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    pump = LogPump(handlers)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(pump.queue_handler)
+    root.setLevel(level)
+    return pump
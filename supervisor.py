@@ -0,0 +1,178 @@
+"""Keeps the shared Chromium instance alive: crash detection, restarts and memory limits."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Collection
+
+from timelapse import encoder_pids
+
+CLOSE_TIMEOUT_SECONDS = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+def process_tree(
+    root_pid: int | None = None, skip: Collection[int] = ()
+) -> list[Path] | None:
+    """``/proc`` entries of ``root_pid`` and all its descendants, except ``skip`` and theirs.
+
+    Returns None on systems without ``/proc``. Chromium is started by the
+    Playwright driver, a child of this process, so the default root covers
+    every browser, renderer and GPU process we own.
+    """
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    root_pid = os.getpid() if root_pid is None else root_pid
+
+    children: dict[int, list[int]] = {}
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The command name in field 2 may contain spaces; fields after it are fixed.
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    tree = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        if pid in skip:
+            continue
+        tree.append(proc / str(pid))
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def process_tree_rss(root_pid: int | None = None, skip: Collection[int] = ()) -> int | None:
+    """Total resident memory in bytes of ``root_pid`` and all its descendants but ``skip``."""
+    tree = process_tree(root_pid, skip)
+    if tree is None:
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for entry in tree:
+        try:
+            total += int((entry / "statm").read_text().split()[1]) * page_size
+        except OSError:
+            continue
+    return total
+
+
+def process_tree_cpu_seconds(root_pid: int | None = None) -> float | None:
+    """User plus system CPU time of ``root_pid`` and its live descendants."""
+    tree = process_tree(root_pid)
+    if tree is None:
+        return None
+    ticks_per_second = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for entry in tree:
+        try:
+            fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # utime and stime are fields 14 and 15 of the whole line.
+        total += int(fields[11]) + int(fields[12])
+    return total / ticks_per_second
+
+
+async def close_quietly(closable: object) -> None:
+    """Close a browser or context, ignoring errors and giving up after a timeout."""
+    if closable is None:
+        return
+    try:
+        await asyncio.wait_for(closable.close(), CLOSE_TIMEOUT_SECONDS)
+    except Exception:
+        pass
+
+
+class BrowserSupervisor:
+    """Owns the browser and the pool of capture slots shared by all targets.
+
+    ``generation`` increases with every (re)launch; runners compare it with the
+    generation their context was created in to notice that it is gone.
+    Restarts take every slot first, so no capture is in flight while the
+    browser is replaced.
+    """
+
+    def __init__(
+        self,
+        playwright: object,
+        headless: bool,
+        max_pages: int,
+        max_rss_bytes: int | None = None,
+    ) -> None:
+        self.playwright = playwright
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_rss_bytes = max_rss_bytes
+        self.pool = asyncio.Semaphore(max_pages)
+        self.restart_lock = asyncio.Lock()
+        self.browser = None
+        self.generation = 0
+        self.disconnected = False
+
+    async def launch(self) -> None:
+        self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        self.browser.on("disconnected", self.on_disconnected)
+        self.disconnected = False
+        self.generation += 1
+
+    def on_disconnected(self, browser: object) -> None:
+        if browser is self.browser:
+            self.disconnected = True
+
+    async def close(self) -> None:
+        await close_quietly(self.browser)
+        self.browser = None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self.pool:
+            yield
+
+    async def restart(self, reason: str, seen_generation: int) -> None:
+        """Relaunch the browser unless someone already did since ``seen_generation``."""
+        async with self.restart_lock:
+            if self.generation != seen_generation:
+                return
+            for _ in range(self.max_pages):
+                await self.pool.acquire()
+            try:
+                logger.warning(f"restarting browser: {reason}", extra={"reason": reason})
+                await close_quietly(self.browser)
+                await self.launch()
+            finally:
+                for _ in range(self.max_pages):
+                    self.pool.release()
+
+    async def ensure_healthy(self) -> None:
+        """Must be called without holding a slot."""
+        if self.disconnected or not self.browser.is_connected():
+            await self.restart("browser disconnected", self.generation)
+
+    async def check_memory(self) -> None:
+        """Restart the browser if its processes use more than ``max_rss_bytes``.
+
+        Timelapse encoders are our children too, but restarting the browser
+        would not shrink them, so they are not counted.
+        """
+        if self.max_rss_bytes is None:
+            return
+        generation = self.generation
+        rss = await asyncio.to_thread(process_tree_rss, skip=encoder_pids())
+        if rss is not None and rss > self.max_rss_bytes:
+            await self.restart(
+                f"memory use {rss / 1024 / 1024:.0f} MB exceeds "
+                f"{self.max_rss_bytes / 1024 / 1024:.0f} MB",
+                generation,
+            )
@@ -0,0 +1,122 @@
+import pytest
+
+from archive_layout import frame_moment, migrate, resolve_layout
+from frame_index import FrameIndex, FrameRecord
+
+FIRST = "fr24_20260101_115959Z.png"
+SECOND = "fr24_20260101_120000Z.png"
+DUPLICATE = "fr24_20260101_120010Z.png.ref"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    root = tmp_path / "snapshots"
+    target = root / "fr24"
+    (target / "crop").mkdir(parents=True)
+    (target / FIRST).write_bytes(b"first")
+    (target / SECOND).write_bytes(b"second")
+    (target / DUPLICATE).write_text(f"{FIRST}\n")
+    (target / "crop" / SECOND).write_bytes(b"crop")
+    (target / "timelapse").mkdir()
+    (target / "timelapse" / SECOND).write_bytes(b"untouched")
+    (target / "notes.txt").write_text("not a frame")
+    return root
+
+
+def test_resolve_layout():
+    assert resolve_layout("hour") == "%Y/%m/%d/%H"
+    assert resolve_layout("%Y-%m") == "%Y-%m"
+    with pytest.raises(ValueError):
+        resolve_layout("../%Y")
+    with pytest.raises(ValueError):
+        resolve_layout("/%Y")
+
+
+def test_frame_moment():
+    assert frame_moment(SECOND).isoformat() == "2026-01-01T12:00:00+00:00"
+    assert frame_moment("fr24_20260101_120000_250Z.png").microsecond == 250000
+    assert frame_moment(DUPLICATE).second == 10
+    assert frame_moment("notes.txt") is None
+
+
+def test_migrate_shards_frames_and_rewrites_refs(archive):
+    target = archive / "fr24"
+
+    assert migrate(archive, resolve_layout("hour")) == 4
+
+    assert (target / "2026/01/01/11" / FIRST).read_bytes() == b"first"
+    assert (target / "2026/01/01/12" / SECOND).read_bytes() == b"second"
+    assert (target / "crop/2026/01/01/12" / SECOND).read_bytes() == b"crop"
+    ref = target / "2026/01/01/12" / DUPLICATE
+    assert ref.read_text() == f"../11/{FIRST}\n"
+    assert (ref.parent / ref.read_text().strip()).read_bytes() == b"first"
+    assert not (target / FIRST).exists() and not (target / DUPLICATE).exists()
+    assert (target / "timelapse" / SECOND).exists()
+    assert (target / "notes.txt").exists()
+
+
+def test_migrate_is_safe_to_rerun(archive):
+    pattern = resolve_layout("hour")
+    migrate(archive, pattern)
+    before = sorted(path for path in archive.rglob("*"))
+
+    assert migrate(archive, pattern) == 0
+    assert sorted(path for path in archive.rglob("*")) == before
+
+
+def test_dry_run_moves_nothing(archive, capsys):
+    before = sorted(path for path in archive.rglob("*"))
+
+    assert migrate(archive, resolve_layout("day"), dry_run=True) == 4
+    assert sorted(path for path in archive.rglob("*")) == before
+    assert len(capsys.readouterr().out.splitlines()) == 4
+
+
+def test_migrate_updates_the_index(archive):
+    target = archive / "fr24"
+    index = FrameIndex(archive / "frames.sqlite3")
+    try:
+        first = FrameRecord(target="fr24", stream="page", captured_at=1.0, width=1, height=1)
+        duplicate = FrameRecord(target="fr24", stream="page", captured_at=2.0, width=1, height=1)
+        index.add(first, target / FIRST, 5, None)
+        index.add(duplicate, target / DUPLICATE, 0, None, "skip", duplicate_of=target / FIRST)
+
+        migrate(archive, resolve_layout("hour"), index=index)
+
+        rows = index.query()
+        assert [row["path"] for row in rows] == [
+            f"fr24/2026/01/01/11/{FIRST}",
+            f"fr24/2026/01/01/12/{DUPLICATE}",
+        ]
+        assert rows[1]["duplicate_of"] == f"fr24/2026/01/01/11/{FIRST}"
+    finally:
+        index.close()
+
+
+def test_reshard_day_to_hour(archive):
+    target = archive / "fr24"
+    migrate(archive, resolve_layout("day"))
+    assert (target / "2026/01/01" / FIRST).exists()
+
+    assert migrate(archive, resolve_layout("hour")) == 4
+
+    assert (target / "2026/01/01/11" / FIRST).read_bytes() == b"first"
+    assert (target / "2026/01/01/12" / SECOND).read_bytes() == b"second"
+    assert (target / "crop/2026/01/01/12" / SECOND).read_bytes() == b"crop"
+    ref = target / "2026/01/01/12" / DUPLICATE
+    assert (ref.parent / ref.read_text().strip()).read_bytes() == b"first"
+    assert not (target / "2026/01/01/2026").exists()
+    assert migrate(archive, resolve_layout("hour")) == 0
+
+
+def test_reshard_hour_back_to_flat_removes_empty_shards(archive):
+    target = archive / "fr24"
+    migrate(archive, resolve_layout("hour"))
+
+    assert migrate(archive, resolve_layout("flat")) == 4
+
+    assert (target / FIRST).read_bytes() == b"first"
+    assert (target / DUPLICATE).read_text() == f"{FIRST}\n"
+    assert (target / "crop" / SECOND).read_bytes() == b"crop"
+    assert not (target / "2026").exists()
+    assert not (target / "crop" / "2026").exists()
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from flight_snapshotter import build_parser, load_config
+
+
+def config_for(tmp_path, document, *argv):
+    path = tmp_path / "snapshotter.json"
+    path.write_text(json.dumps(document))
+    args = build_parser().parse_args(["--config", str(path), *argv])
+    return load_config(args)
+
+
+def test_targets_inherit_top_level_options(tmp_path):
+    config = config_for(
+        tmp_path,
+        {
+            "min-minutes": 2,
+            "max-minutes": 4,
+            "targets": [
+                {"name": "uk", "url": "https://example.com/uk"},
+                {"name": "us", "url": "https://example.com/us", "max-minutes": 8},
+            ],
+        },
+    )
+    uk, us = config.targets
+    assert (uk.min_minutes, uk.max_minutes) == (2, 4)
+    assert (us.min_minutes, us.max_minutes) == (2, 8)
+
+
+def test_null_restores_the_default(tmp_path):
+    defaults = build_parser().parse_args([])
+    config = config_for(
+        tmp_path,
+        {
+            "min-minutes": None,
+            "targets": [
+                {"name": "uk", "url": "https://example.com/uk", "settle-seconds": None},
+            ],
+        },
+        "--min-minutes", "1", "--settle-seconds", "3",
+    )
+    (uk,) = config.targets
+    assert uk.min_minutes == defaults.min_minutes
+    assert uk.settle_seconds == defaults.settle_seconds
+
+
+@pytest.mark.parametrize(
+    "document, message",
+    [
+        ({"no-such-option": 1}, "unknown option"),
+        ({"min-minutes": "soon"}, "min-minutes"),
+        ({"min-minutes": True}, "does not take true"),
+        ({"targets": []}, "non-empty list"),
+        ({"targets": [{"name": "uk"}]}, "'url' is required"),
+    ],
+)
+def test_invalid_files_raise_value_error(tmp_path, document, message):
+    with pytest.raises(ValueError, match=message):
+        config_for(tmp_path, document)
@@ -0,0 +1,70 @@
+import json
+
+from feed_log import FeedLog, FeedResponse, fr24_positions, read_feed_log
+
+CAPTURED_AT = 1767268800.0  # 2026-01-01 12:00:00 UTC
+
+
+def aircraft(lat, timestamp):
+    return ["4CA123", lat, -1.5, 90, 35000, 450, "1234", "F-EGLL1", "A320", "G-ABCD",
+            timestamp, "LHR", "DUB", "BA123", 0, 0, "BAW123"]
+
+
+def feed(body, url="https://data.example.com/feed.js?bounds=1"):
+    return FeedResponse(url, 200, CAPTURED_AT, json.dumps(body).encode())
+
+
+def write_log(directory, count):
+    log = FeedLog(directory)
+    try:
+        for number in range(count):
+            log.append("fr24", f"frame{number}.png", CAPTURED_AT + number, [feed({"n": number})])
+    finally:
+        log.close()
+    return log.path_for(CAPTURED_AT)
+
+
+def test_round_trip(tmp_path):
+    log = FeedLog(tmp_path)
+    log.append("fr24", "frame.png", CAPTURED_AT, [
+        feed({"full_count": 1}),
+        FeedResponse("https://example.com/x", 500, CAPTURED_AT, b"<html>"),
+    ])
+    log.close()
+
+    (entry,) = read_feed_log(tmp_path / "20260101.feedlog")
+    assert (entry.target, entry.frame, entry.captured_at) == ("fr24", "frame.png", CAPTURED_AT)
+    assert entry.responses[0]["json"] == {"full_count": 1}
+    assert entry.responses[1]["text"] == "<html>"
+    assert entry.responses[1]["status"] == 500
+
+
+def test_torn_tail_is_ignored(tmp_path):
+    path = write_log(tmp_path, 3)
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+
+    assert [entry.frame for entry in read_feed_log(path)] == ["frame0.png", "frame1.png"]
+
+
+def test_corrupt_record_ends_the_log(tmp_path):
+    path = write_log(tmp_path, 3)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert len(list(read_feed_log(path))) == 2
+
+
+def test_fr24_positions_keeps_the_newest_fix_per_flight(tmp_path):
+    log = FeedLog(tmp_path)
+    log.append("fr24", "frame.png", CAPTURED_AT, [
+        feed({"full_count": 2, "version": 4, "2f1a": aircraft(52.0, 100)}),
+        feed({"2f1a": aircraft(52.1, 110), "2f1b": aircraft("bad", 100)}),
+    ])
+    log.close()
+
+    (entry,) = read_feed_log(tmp_path / "20260101.feedlog")
+    (position,) = fr24_positions(entry)
+    assert (position.flight_id, position.lat, position.timestamp) == ("2f1a", 52.1, 110.0)
+    assert position.callsign == "BAW123"
@@ -0,0 +1,43 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from dedupe import DedupeSettings, FrameDeduper  # noqa: E402
+from frame_writer import FrameWriter  # noqa: E402
+
+
+def png(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def slowly(data):
+    time.sleep(0.2)
+    return data
+
+
+async def write_burst(tmp_path, action):
+    writer = FrameWriter(workers=2)
+    deduper = FrameDeduper(DedupeSettings(action=action))
+    try:
+        # The first frame takes longer to process than the identical one after it.
+        first = await writer.submit(tmp_path / "1.png", png("red"), (slowly,), deduper)
+        second = await writer.submit(tmp_path / "2.png", png("red"), (), deduper)
+        return await first, await second
+    finally:
+        writer.close()
+
+
+@pytest.mark.parametrize("action", ["skip", "link", "ref"])
+def test_stream_frames_are_deduplicated_in_submission_order(tmp_path, action):
+    first, second = asyncio.run(write_burst(tmp_path, action))
+
+    assert first.duplicate_of is None
+    assert first.path.exists()
+    assert second.duplicate_of == tmp_path / "1.png"
+    assert second.frame_path.read_bytes() == png("red")
@@ -0,0 +1,78 @@
+import pytest
+
+from leases import LeaseStore
+
+NAMES = ["a", "b", "c", "d"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LeaseStore(tmp_path / "leases.sqlite3", lease_seconds=30.0)
+    yield store
+    store.close()
+
+
+def holders(store):
+    return {target: holder for target, holder, expires in store.status()}
+
+
+def test_single_node_holds_everything(store):
+    assert store.sync("one", NAMES, now=0.0) == NAMES
+    assert store.sync("one", NAMES, now=10.0) == NAMES
+    assert holders(store) == dict.fromkeys(NAMES, "one")
+
+
+def test_nodes_share_the_targets(tmp_path, store):
+    other = LeaseStore(tmp_path / "leases.sqlite3", lease_seconds=30.0)
+    try:
+        store.sync("one", NAMES, now=0.0)
+        # The new node counts itself, so the first node's share shrinks to half...
+        assert other.sync("two", NAMES, now=1.0) == []
+        assert store.sync("one", NAMES, now=2.0) == ["a", "b"]
+        # ...and what it gave up is free for the second node.
+        assert other.sync("two", NAMES, now=3.0) == ["c", "d"]
+        assert holders(store) == {"a": "one", "b": "one", "c": "two", "d": "two"}
+    finally:
+        other.close()
+
+
+def test_leases_of_a_dead_node_are_taken_over(store):
+    store.sync("one", NAMES, now=0.0)
+    store.sync("two", NAMES, now=1.0)
+    store.sync("one", NAMES, now=2.0)
+    store.sync("two", NAMES, now=3.0)
+
+    # "one" stops renewing; after the lease period "two" is alone and claims all.
+    assert store.sync("two", NAMES, now=20.0) == ["c", "d"]
+    assert sorted(store.sync("two", NAMES, now=33.0)) == NAMES
+
+
+def test_release_hands_over_at_once(store):
+    store.sync("one", NAMES, now=0.0)
+    store.sync("two", NAMES, now=1.0)
+    store.sync("one", NAMES, now=2.0)
+
+    store.release("one")
+
+    assert store.sync("two", NAMES, now=3.0) == NAMES
+
+
+def test_removed_targets_are_released(store):
+    store.sync("one", NAMES, now=0.0)
+    assert store.sync("one", ["a", "c"], now=1.0) == ["a", "c"]
+    assert holders(store) == {"a": "one", "c": "one"}
+
+
+@pytest.mark.parametrize("targets, nodes, shares", [(4, 3, [2, 1, 1]), (5, 4, [2, 1, 1, 1])])
+def test_remainder_is_spread_one_per_node(store, targets, nodes, shares):
+    names = [f"t{number}" for number in range(targets)]
+    node_ids = [f"node{number}" for number in range(nodes)]
+    now = 0.0
+    for _round in range(3):
+        for holder in node_ids:
+            store.sync(holder, names, now=now)
+            now += 1
+
+    counts = [list(holders(store).values()).count(holder) for holder in node_ids]
+    assert counts == shares
+    assert len(holders(store)) == targets
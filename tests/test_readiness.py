@@ -0,0 +1,42 @@
+import asyncio
+
+from readiness import StableFramesReady
+
+
+class FakeSession:
+    def __init__(self, frames):
+        self.frames = iter(frames)
+        self.requests = []
+        self.detached = False
+
+    async def send(self, method, params):
+        self.requests.append((method, params))
+        return {"data": next(self.frames)}
+
+    async def detach(self):
+        self.detached = True
+
+
+class FakePage:
+    def __init__(self, session):
+        self.context = self
+        self.session = session
+
+    async def evaluate(self, expression):
+        return [0, 40, 1920, 1080]
+
+    async def new_cdp_session(self, page):
+        return self.session
+
+
+def test_stable_frames_waits_for_identical_downscaled_frames():
+    session = FakeSession(["a", "b", "b", "c", "c", "c", "d"])
+    check = StableFramesReady(frames=2, interval_seconds=0)
+
+    asyncio.run(check.wait(FakePage(session)))
+
+    assert len(session.requests) == 6
+    method, params = session.requests[0]
+    assert method == "Page.captureScreenshot"
+    assert params["clip"] == {"x": 0, "y": 40, "width": 1920, "height": 1080, "scale": 0.25}
+    assert session.detached
@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from feed_log import Position  # noqa: E402
+from render_feed import MapView, Tracks, fit_view, marker_offsets, render_frame  # noqa: E402
+
+VIEW = MapView(400, 300, 52.0, 0.0, 8)
+
+
+def fix(flight, timestamp, lat, lon, track=90.0, altitude=30000.0):
+    return Position(
+        frame="frame.png", captured_at=timestamp, flight_id=flight, icao24=flight, callsign=flight,
+        lat=lat, lon=lon, track=track, altitude_ft=altitude, speed_kt=400.0, timestamp=timestamp,
+    )
+
+
+def tracks(positions, max_gap=600.0, hold=60.0):
+    return Tracks(positions, VIEW, max_gap=max_gap, hold=hold)
+
+
+def test_positions_are_interpolated_between_fixes():
+    recorded = tracks([fix("a", 0.0, 52.0, -0.1), fix("a", 100.0, 52.0, 0.1)])
+    start_x, _ = VIEW.project(np.array([52.0]), np.array([-0.1]))
+    end_x, _ = VIEW.project(np.array([52.0]), np.array([0.1]))
+
+    x, y, heading, altitude = recorded.at(25.0)
+    assert x == pytest.approx(start_x + 0.25 * (end_x - start_x))
+    assert y == pytest.approx([VIEW.height / 2])
+    assert heading == pytest.approx([np.pi / 2])
+    assert altitude.tolist() == [30000.0]
+    assert recorded.at(50.0)[0] == pytest.approx([VIEW.width / 2])
+
+
+def test_gaps_are_not_joined_and_last_fixes_are_held():
+    recorded = tracks(
+        [fix("a", 0.0, 52.0, -0.1), fix("a", 1000.0, 52.0, 0.1)], max_gap=600.0, hold=60.0
+    )
+    held_x, _ = VIEW.project(np.array([52.0]), np.array([-0.1]))
+
+    assert recorded.at(30.0)[0] == pytest.approx(held_x)
+    assert len(recorded.at(90.0)[0]) == 0
+    assert len(recorded.at(1030.0)[0]) == 1
+    assert len(recorded.at(1100.0)[0]) == 0
+    assert (recorded.start, recorded.end) == (0.0, 1060.0)
+
+
+def test_flights_are_kept_apart_and_duplicate_fixes_merged():
+    recorded = tracks([
+        fix("a", 0.0, 52.0, 0.0),
+        fix("b", 10.0, 52.1, 0.0),
+        fix("a", 0.0, 52.0, 0.0),
+        fix("a", 20.0, 52.0, 0.05),
+        fix("b", 30.0, 52.1, 0.05),
+    ])
+
+    assert (recorded.flights, len(recorded)) == (2, 4)
+    assert len(recorded.at(-1.0)[0]) == 0
+    assert len(recorded.at(5.0)[0]) == 1
+    assert len(recorded.at(15.0)[0]) == 2
+
+
+def test_fit_view_shows_every_position():
+    lats, lons = [51.0, 53.5], [-2.0, 1.5]
+    view = fit_view(400, 300, lats, lons)
+    x, y = view.project(np.array(lats), np.array(lons))
+
+    assert ((x > 0) & (x < 400) & (y > 0) & (y < 300)).all()
+
+
+def test_render_frame_draws_markers_onto_a_copy():
+    basemap = np.zeros((VIEW.height, VIEW.width, 3), dtype=np.uint8)
+    recorded = tracks([fix("a", 0.0, 52.0, 0.0), fix("a", 10.0, 52.0, 0.0)])
+
+    frame = render_frame(basemap, recorded, 5.0, marker_offsets(6.0))
+
+    assert not basemap.any()
+    assert frame[VIEW.height // 2, VIEW.width // 2].any()
+    assert not frame[0, 0].any()
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+
+URL = "https://example.com/app.js"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path / "cache", max_bytes=1000, default_ttl_seconds=60.0)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    "headers, ttl",
+    [
+        ({}, 60.0),
+        ({"cache-control": "public, max-age=300"}, 300.0),
+        ({"cache-control": "max-age=0"}, None),
+        ({"cache-control": "no-store"}, None),
+        ({"cache-control": "private, no-cache"}, None),
+        ({"vary": "*"}, None),
+    ],
+)
+def test_ttl_for(cache, headers, ttl):
+    assert cache.ttl_for(headers) == ttl
+
+
+def test_round_trip_survives_restart(tmp_path, cache):
+    headers = {"Content-Type": "text/javascript", "Content-Length": "4"}
+    assert cache.put(URL, {}, 200, headers, b"code")
+    cache.close()
+
+    reopened = ResponseCache(tmp_path / "cache", max_bytes=1000, default_ttl_seconds=60.0)
+    try:
+        cached = reopened.get(URL, {})
+        assert cached.body == b"code"
+        assert cached.headers == {"content-type": "text/javascript"}
+        assert reopened.total_bytes == 4
+        assert reopened.take_stats() == (1, 0)
+    finally:
+        reopened.close()
+
+
+def test_uncacheable_responses_are_not_stored(cache):
+    assert not cache.put(URL, {}, 404, {}, b"missing")
+    assert not cache.put(URL, {}, 200, {"Cache-Control": "no-cache"}, b"code")
+    assert not cache.put(URL, {}, 200, {}, b"x" * 1001)
+    assert cache.get(URL, {}) is None
+    assert cache.total_bytes == 0
+
+
+def test_vary_headers_are_part_of_the_key(cache):
+    cache.put(URL, {"accept-language": "en"}, 200, {"Vary": "Accept-Language"}, b"english")
+    cache.put(URL, {"accept-language": "de"}, 200, {"Vary": "Accept-Language"}, b"deutsch")
+
+    assert cache.get(URL, {"accept-language": "en"}).body == b"english"
+    assert cache.get(URL, {"accept-language": "de"}).body == b"deutsch"
+    assert cache.get(URL, {"accept-language": "fr"}) is None
+
+
+def test_expired_entries_are_dropped(cache, monkeypatch):
+    cache.put(URL, {}, 200, {"Cache-Control": "max-age=10"}, b"code")
+    later = time.time() + 11
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert cache.get(URL, {}) is None
+    assert cache.total_bytes == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    for name in ("a", "b", "c"):
+        cache.put(f"https://example.com/{name}", {}, 200, {}, b"x" * 400)
+        now[0] += 1
+    assert cache.get("https://example.com/a", {}) is None
+
+    # Touching b makes c the least recently used entry.
+    now[0] += 1
+    assert cache.get("https://example.com/b", {}) is not None
+    now[0] += 1
+    cache.put("https://example.com/d", {}, 200, {}, b"x" * 400)
+
+    assert cache.get("https://example.com/c", {}) is None
+    assert cache.get("https://example.com/b", {}) is not None
+    assert cache.get("https://example.com/d", {}) is not None
+    assert cache.total_bytes == 800
+
+
+def test_hits_are_remembered_across_restarts(tmp_path, cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    for name in ("a", "b"):
+        cache.put(f"https://example.com/{name}", {}, 200, {}, b"x" * 400)
+        now[0] += 1
+    assert cache.get("https://example.com/a", {}) is not None
+    cache.close()
+
+    reopened = ResponseCache(tmp_path / "cache", max_bytes=1000, default_ttl_seconds=60.0)
+    try:
+        now[0] += 1
+        reopened.put("https://example.com/c", {}, 200, {}, b"x" * 400)
+        assert reopened.get("https://example.com/b", {}) is None
+        assert reopened.get("https://example.com/a", {}) is not None
+    finally:
+        reopened.close()
+
+
+def test_handle_serves_hits_without_the_network(cache):
+    cache.put(URL, {}, 200, {"Content-Type": "text/javascript"}, b"code")
+
+    class Route:
+        class request:
+            method = "GET"
+            url = URL
+            resource_type = "script"
+            headers = {}
+
+        async def fulfill(self, **response):
+            self.response = response
+
+        async def fetch(self):
+            raise AssertionError("cache hit went to the network")
+
+    route = Route()
+    asyncio.run(cache.handle(route))
+    assert route.response["body"] == b"code"
@@ -0,0 +1,54 @@
+from scheduler import GridScheduler
+
+
+class Clocks:
+    def __init__(self, wall: float) -> None:
+        self.now = 100.0
+        self.offset = wall - self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def wall(self) -> float:
+        return self.now + self.offset
+
+
+def scheduler(clocks: Clocks, interval: float = 300.0) -> GridScheduler:
+    return GridScheduler(interval, monotonic=clocks.monotonic, wall=clocks.wall)
+
+
+def test_ticks_follow_the_wall_clock_grid():
+    clocks = Clocks(wall=1_000_010.0)
+    grid = scheduler(clocks)
+
+    tick = grid.next_tick()
+    assert tick.wall_time == 1_000_200.0
+    assert tick.deadline == clocks.now + 190.0
+    assert tick.missed == 0
+
+    clocks.now = tick.deadline + 5.0
+    assert grid.next_tick().wall_time == 1_000_500.0
+
+
+def test_overrun_counts_missed_marks():
+    clocks = Clocks(wall=1_000_010.0)
+    grid = scheduler(clocks)
+    tick = grid.next_tick()
+
+    clocks.now = tick.deadline + 700.0
+    tick = grid.next_tick()
+    assert tick.wall_time == 1_001_100.0
+    assert tick.missed == 2
+
+
+def test_clock_step_reanchors_without_counting_missed_marks():
+    clocks = Clocks(wall=1_000_010.0)
+    grid = scheduler(clocks)
+    tick = grid.next_tick()
+
+    clocks.now = tick.deadline
+    clocks.offset += 3600.0
+    tick = grid.next_tick()
+    assert tick.wall_time == 1_004_100.0
+    assert tick.deadline == clocks.now + 300.0
+    assert tick.missed == 0
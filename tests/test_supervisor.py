@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from supervisor import process_tree
+
+pytestmark = pytest.mark.skipif(not Path("/proc").is_dir(), reason="needs /proc")
+
+
+@pytest.fixture
+def child():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+def test_process_tree_includes_children(child):
+    pids = {int(entry.name) for entry in process_tree()}
+    assert {os.getpid(), child.pid} <= pids
+
+
+def test_process_tree_leaves_out_skipped_subtrees(child):
+    pids = {int(entry.name) for entry in process_tree(skip={child.pid})}
+    assert os.getpid() in pids
+    assert child.pid not in pids
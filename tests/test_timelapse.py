@@ -0,0 +1,130 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from timelapse import (
+    MANIFEST_NAME,
+    TimelapseEncoder,
+    TimelapseSettings,
+    build_command,
+    encoder_pids,
+    rebuild_manifest,
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs an executable script")
+
+# Stands in for ffmpeg: appends whatever it is piped to "received" and lists
+# one segment, as ffmpeg's segment muxer would.
+FAKE_FFMPEG = """#!{python}
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+output = Path(args[-1])
+with open(output.parent / "received", "ab") as received:
+    received.write(sys.stdin.buffer.read())
+if "-segment_list" in args:
+    segment = output.name.replace("%05d", "00000")
+    Path(args[args.index("-segment_list") + 1]).write_text(segment + ",0.0,1.0\\n")
+"""
+
+
+@pytest.fixture
+def ffmpeg(tmp_path):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable))
+    path.chmod(0o755)
+    return str(path)
+
+
+def frames(directory, count):
+    paths = []
+    for number in range(count):
+        path = directory / f"frame{number}.png"
+        path.write_bytes(f"<{number}>".encode())
+        paths.append(path)
+    return paths
+
+
+def test_build_command_mp4_segments():
+    settings = TimelapseSettings(fps=60, segment_seconds=30, crf=20)
+    command = build_command(settings, Path("out"), "S", "png", "ffmpeg")
+
+    assert command[0] == "ffmpeg"
+    assert command[command.index("-framerate") + 1] == "60"
+    assert command[command.index("-c:v") + 1] == "png"
+    assert command[command.index("-crf") + 1] == "20"
+    assert command[command.index("-segment_time") + 1] == "30"
+    assert "expr:gte(t,n_forced*30)" in command
+    assert command[command.index("-segment_list") + 1] == str(Path("out/.session_S.csv"))
+    assert command[-1] == str(Path("out/segment_S_%05d.mp4"))
+
+
+def test_build_command_hls_appends_to_the_playlist():
+    command = build_command(TimelapseSettings(container="hls"), Path("out"), "S", "mjpeg", "ff")
+
+    assert command[command.index("-hls_time") + 1] == "60"
+    assert "append_list" in command[command.index("-hls_flags") + 1]
+    assert command[command.index("-hls_segment_filename") + 1] == str(
+        Path("out/segment_S_%05d.ts")
+    )
+    assert command[-1] == str(Path("out/timelapse.m3u8"))
+
+
+def test_rebuild_manifest_lists_sessions_in_order(tmp_path):
+    (tmp_path / ".session_20260102_000000_000000Z.csv").write_text(
+        "segment_20260102_000000_000000Z_00000.mp4,0.0,60.0\n"
+    )
+    (tmp_path / ".session_20260101_000000_000000Z.csv").write_text(
+        "segment_20260101_000000_000000Z_00000.mp4,0.0,60.0\n"
+        "segment_20260101_000000_000000Z_00001.mp4,60.0,90.0\n\n"
+    )
+
+    manifest = rebuild_manifest(tmp_path)
+
+    assert manifest == tmp_path / MANIFEST_NAME
+    assert manifest.read_text().splitlines() == [
+        "ffconcat version 1.0",
+        "file 'segment_20260101_000000_000000Z_00000.mp4'",
+        "file 'segment_20260101_000000_000000Z_00001.mp4'",
+        "file 'segment_20260102_000000_000000Z_00000.mp4'",
+    ]
+
+
+def test_frames_are_encoded_in_reserved_order(tmp_path, ffmpeg):
+    output = tmp_path / "timelapse"
+    encoder = TimelapseEncoder(output, TimelapseSettings(), "png", "test", ffmpeg=ffmpeg)
+    paths = frames(tmp_path, 5)
+    sequences = [encoder.reserve() for _ in paths]
+
+    # Written out of order; frame 2 failed and frame 3 names a missing file.
+    encoder.add(sequences[4], paths[4])
+    encoder.add(sequences[1], paths[1])
+    encoder.add(sequences[2], None)
+    encoder.add(sequences[3], tmp_path / "missing.png")
+    encoder.add(sequences[0], paths[0])
+    encoder.close()
+
+    assert (output / "received").read_bytes() == b"<0><1><4>"
+    assert len(list(output.glob(".session_*.csv"))) == 1
+    assert (output / MANIFEST_NAME).read_text().splitlines()[1].startswith("file 'segment_")
+    assert not encoder_pids()
+
+
+def test_a_gap_holds_back_later_frames(tmp_path, ffmpeg):
+    encoder = TimelapseEncoder(tmp_path / "timelapse", TimelapseSettings(), "png", "test", ffmpeg)
+    paths = frames(tmp_path, 3)
+    first, second, third = (encoder.reserve() for _ in paths)
+
+    encoder.add(second, paths[1])
+    encoder.add(third, paths[2])
+    assert encoder.next_released == 0
+    assert sorted(encoder.ready) == [second, third]
+
+    encoder.add(first, paths[0])
+    assert encoder.next_released == 3
+    assert not encoder.ready
+    encoder.close()
+
+    assert (tmp_path / "timelapse" / "received").read_bytes() == b"<0><1><2>"
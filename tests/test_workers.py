@@ -0,0 +1,89 @@
+import time
+from dataclasses import replace
+
+from flight_snapshotter import build_parser, config_from_args
+from workers import WorkerPool, partition, target_cost
+
+
+class FakeProcess:
+    def __init__(self) -> None:
+        self.pid = 0
+        self.exitcode = None
+        self.killed = False
+
+    def is_alive(self) -> bool:
+        return not self.killed
+
+    def kill(self) -> None:
+        self.killed = True
+        self.exitcode = -9
+
+    def join(self, timeout: float | None = None) -> None:
+        pass
+
+
+def make_config(count: int, *argv: str):
+    urls = [arg for number in range(count) for arg in ("--url", f"https://example.com/{number}")]
+    return config_from_args(build_parser().parse_args([*urls, *argv]))
+
+
+def make_pool(config, count: int) -> WorkerPool:
+    pool = WorkerPool(config, count, run=None, restart_needed=lambda old, new: [])
+    started = []
+
+    def spawn(worker):
+        started.append(worker.number)
+        worker.config = None
+        worker.process = FakeProcess()
+        worker.last_report = time.monotonic()
+
+    pool.spawn = spawn
+    pool.started = started
+    for worker in pool.workers:
+        pool.spawn(worker)
+    pool.send_assignments()
+    started.clear()
+    return pool
+
+
+def test_partition_balances_cost_and_keeps_current_workers():
+    config = make_config(5)
+    cheap, *rest = config.targets
+    expensive = replace(rest[0], align_seconds=10)
+    targets = [cheap, expensive, *rest[1:]]
+
+    assignment = partition(targets, [1, 2])
+    assert assignment[expensive.name] == 1
+    assert all(worker == 2 for name, worker in assignment.items() if name != expensive.name)
+    assert target_cost(expensive) > sum(target_cost(target) for target in rest[1:])
+
+    moved = partition(targets, [2, 3], current=assignment)
+    assert moved[expensive.name] == 3
+    assert all(moved[name] == 2 for name in assignment if name != expensive.name)
+
+
+def test_stalled_worker_is_killed_and_restarted():
+    pool = make_pool(make_config(2), 2)
+    worker = pool.workers[0]
+    worker.last_report -= pool.stall_seconds(worker) + 1
+
+    pool.check_workers()
+
+    assert pool.started == [1]
+    assert not pool.workers[1].process.killed
+
+
+def test_idle_worker_that_gets_targets_is_not_taken_for_stalled():
+    pool = make_pool(make_config(2), 3)
+    idle = [worker for worker in pool.workers if not pool.targets_of(worker)]
+    assert len(idle) == 1
+    # Idle workers never report, however long they run.
+    idle[0].last_report -= 100000
+
+    pool.config = make_config(3)
+    pool.reassign()
+    assert pool.targets_of(idle[0])
+    pool.check_workers()
+
+    assert pool.started == []
+    assert not idle[0].process.killed
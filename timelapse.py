@@ -0,0 +1,225 @@
+"""Streaming timelapse encoder that feeds captured frames into a long-running ffmpeg.
+
+Every encoder session writes numbered segments whose names start with the
+session's UTC stamp, so a restart simply begins a new segment series next to
+the old ones. For MP4 output a ``timelapse.ffconcat`` manifest lists every
+completed segment in order (``ffmpeg -f concat -i timelapse.ffconcat -c copy
+out.mp4`` joins them); for HLS the ``timelapse.m3u8`` playlist is appended to
+across sessions.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CONTAINERS = ("mp4", "hls")
+INPUT_CODECS = {"png": "png", "jpeg": "mjpeg", "webp": "webp"}
+MANIFEST_NAME = "timelapse.ffconcat"
+PLAYLIST_NAME = "timelapse.m3u8"
+
+# Process ids of the ffmpeg encoders running in this process.
+running_pids: set[int] = set()
+running_pids_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class TimelapseSettings:
+    container: str = "mp4"
+    fps: float = 30.0
+    segment_seconds: float = 60.0
+    crf: int = 23
+
+
+def require_ffmpeg(ffmpeg: str = "ffmpeg") -> None:
+    if shutil.which(ffmpeg) is None:
+        raise SystemExit(
+            f"Missing dependency for --timelapse: {ffmpeg}. Install ffmpeg and make sure it is on PATH."
+        )
+
+
+def encoder_pids() -> frozenset[int]:
+    """Process ids of the ffmpeg encoders currently running in this process."""
+    with running_pids_lock:
+        return frozenset(running_pids)
+
+
+def build_command(
+    settings: TimelapseSettings, directory: Path, session: str, input_codec: str, ffmpeg: str
+) -> list[str]:
+    segment = f"{settings.segment_seconds:g}"
+    command = [
+        ffmpeg, "-hide_banner", "-loglevel", "error",
+        "-f", "image2pipe", "-framerate", f"{settings.fps:g}", "-c:v", input_codec, "-i", "-",
+        # yuv420p needs even dimensions; odd-sized crops lose one pixel.
+        "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2,format=yuv420p",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", str(settings.crf),
+        "-force_key_frames", f"expr:gte(t,n_forced*{segment})",
+    ]
+    if settings.container == "hls":
+        command += [
+            "-f", "hls", "-hls_time", segment, "-hls_list_size", "0",
+            "-hls_flags", "append_list+discont_start+omit_endlist",
+            "-hls_segment_filename", str(directory / f"segment_{session}_%05d.ts"),
+            str(directory / PLAYLIST_NAME),
+        ]
+    else:
+        command += [
+            "-f", "segment", "-segment_time", segment, "-reset_timestamps", "1",
+            "-segment_format", "mp4",
+            # Fragmented MP4 keeps the segment being written playable.
+            "-segment_format_options", "movflags=+frag_keyframe+empty_moov+default_base_moof",
+            "-segment_list", str(directory / f".session_{session}.csv"),
+            "-segment_list_type", "csv",
+            str(directory / f"segment_{session}_%05d.mp4"),
+        ]
+    return command
+
+
+def rebuild_manifest(directory: Path) -> Path:
+    """Write an ffconcat manifest of every completed MP4 segment in ``directory``."""
+    lines = ["ffconcat version 1.0"]
+    for session_list in sorted(directory.glob(".session_*.csv")):
+        for row in session_list.read_text().splitlines():
+            filename = row.split(",", 1)[0].strip()
+            if filename:
+                lines.append(f"file '{filename}'")
+    manifest = directory / MANIFEST_NAME
+    tmp_path = directory / f".{MANIFEST_NAME}.tmp"
+    tmp_path.write_text("\n".join(lines) + "\n")
+    tmp_path.replace(manifest)
+    return manifest
+
+
+class TimelapseEncoder:
+    """Pipes frame files into ffmpeg from a dedicated thread, strictly in capture order.
+
+    Frames are registered with a sequence number when they are captured
+    (:meth:`reserve`) and handed over once written (:meth:`add`), so frames
+    finished out of order by the writer pool are still encoded in order.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        settings: TimelapseSettings,
+        input_format: str,
+        label: str,
+        ffmpeg: str = "ffmpeg",
+    ) -> None:
+        self.directory = directory
+        self.settings = settings
+        self.input_codec = INPUT_CODECS[input_format]
+        self.label = label
+        self.ffmpeg = ffmpeg
+        self.lock = threading.Lock()
+        self.next_reserved = 0
+        self.next_released = 0
+        self.ready: dict[int, Path | None] = {}
+        self.frames: queue.Queue[Path | None] = queue.Queue()
+        self.process: subprocess.Popen | None = None
+        self.session = ""
+        self.session_list_size = -1
+        self.thread = threading.Thread(target=self.pump, name=f"timelapse-{label}", daemon=True)
+        self.thread.start()
+
+    def reserve(self) -> int:
+        with self.lock:
+            sequence = self.next_reserved
+            self.next_reserved += 1
+            return sequence
+
+    def add(self, sequence: int, path: Path | None) -> None:
+        """Hand over frame ``sequence``; ``None`` means it was never written."""
+        with self.lock:
+            self.ready[sequence] = path
+            while self.next_released in self.ready:
+                released = self.ready.pop(self.next_released)
+                self.next_released += 1
+                if released is not None:
+                    self.frames.put(released)
+
+    def close(self) -> None:
+        self.frames.put(None)
+        self.thread.join()
+
+    def start_session(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Microseconds keep a quick restart from reusing the previous session's names.
+        self.session = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S_%fZ")
+        self.session_list_size = -1
+        command = build_command(
+            self.settings, self.directory, self.session, self.input_codec, self.ffmpeg
+        )
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        with running_pids_lock:
+            running_pids.add(self.process.pid)
+        logger.info(
+            f"Timelapse session {self.session} -> {self.directory}",
+            extra={"target": self.label, "stage": "timelapse"},
+        )
+
+    def stop_session(self) -> None:
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self.process.wait()
+        with running_pids_lock:
+            running_pids.discard(self.process.pid)
+        self.process = None
+        self.refresh_manifest()
+
+    def refresh_manifest(self) -> None:
+        if self.settings.container != "mp4":
+            return
+        session_list = self.directory / f".session_{self.session}.csv"
+        size = session_list.stat().st_size if session_list.exists() else 0
+        if size != self.session_list_size:
+            self.session_list_size = size
+            rebuild_manifest(self.directory)
+
+    def pump(self) -> None:
+        while True:
+            path = self.frames.get()
+            if path is None:
+                self.stop_session()
+                return
+            try:
+                data = path.read_bytes()
+            except OSError as exc:
+                logger.warning(
+                    f"timelapse skipped {path}: {exc}",
+                    extra={"target": self.label, "stage": "timelapse", "path": path},
+                )
+                continue
+            for _attempt in range(2):
+                if self.process is None or self.process.poll() is not None:
+                    self.stop_session()
+                    self.start_session()
+                try:
+                    self.process.stdin.write(data)
+                    self.process.stdin.flush()
+                    break
+                except BrokenPipeError:
+                    logger.warning(
+                        "ffmpeg exited; starting a new segment.",
+                        extra={"target": self.label, "stage": "timelapse"},
+                    )
+                    self.stop_session()
+            else:
+                logger.error(
+                    f"timelapse dropped {path}: ffmpeg keeps failing.",
+                    extra={"target": self.label, "stage": "timelapse", "path": path},
+                )
+            self.refresh_manifest()
@@ -0,0 +1,93 @@
+"""Extra views of an already loaded page: other viewport sizes, map positions and clips."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from crops import NAME_RE
+
+NUMBER = r"-?\d+(?:\.\d+)?"
+VIEW_RE = re.compile(
+    rf"^(?:(?P<width>\d+)x(?P<height>\d+))?"
+    rf"(?:@(?P<lat>{NUMBER}),(?P<lon>{NUMBER})/(?P<zoom>{NUMBER}))?"
+    rf"(?:\+(?P<clip>{NUMBER},{NUMBER},{NUMBER},{NUMBER}))?$"
+)
+
+# Moves a single-page map app in place: push the new map path onto the history
+# and let the app's router react to it, without reloading the page.
+NAVIGATE_JS = """view => {
+  history.pushState(history.state, "", view.path);
+  dispatchEvent(new PopStateEvent("popstate", { state: history.state }));
+}"""
+
+
+@dataclass(frozen=True)
+class View:
+    """Another output of the same page; unset fields keep the target's viewport and position."""
+
+    name: str
+    width: int | None = None
+    height: int | None = None
+    lat: float | None = None
+    lon: float | None = None
+    zoom: float | None = None
+    clip: tuple[float, float, float, float] | None = None
+
+    def viewport(self, width: int, height: int) -> dict[str, int]:
+        return {"width": self.width or width, "height": self.height or height}
+
+    @property
+    def path(self) -> str | None:
+        """The Flightradar24-style map path ``/LAT,LON/ZOOM``, if the view moves the map."""
+        if self.zoom is None:
+            return None
+        return f"/{self.lat:g},{self.lon:g}/{self.zoom:g}"
+
+    def navigation(self) -> dict[str, object]:
+        return navigation(self.path, self.lat, self.lon, self.zoom)
+
+    def clip_rect(self) -> dict[str, float] | None:
+        if self.clip is None:
+            return None
+        x, y, width, height = self.clip
+        return {"x": x, "y": y, "width": width, "height": height}
+
+
+def navigation(
+    path: str | None,
+    lat: float | None = None,
+    lon: float | None = None,
+    zoom: float | None = None,
+) -> dict[str, object]:
+    """The argument passed to the navigation script."""
+    return {"path": path, "lat": lat, "lon": lon, "zoom": zoom}
+
+
+def parse_view(spec: str) -> View:
+    """Parse ``NAME=[WIDTHxHEIGHT][@LAT,LON/ZOOM][+X,Y,WIDTH,HEIGHT]``."""
+    name, sep, value = spec.partition("=")
+    name = name.strip()
+    match = VIEW_RE.match(value.strip())
+    if not sep or not NAME_RE.match(name) or match is None or not value.strip():
+        raise ValueError(
+            f"expected NAME=[WIDTHxHEIGHT][@LAT,LON/ZOOM][+X,Y,WIDTH,HEIGHT], got {spec!r}"
+        )
+    width = height = None
+    if match["width"]:
+        width, height = int(match["width"]), int(match["height"])
+        if width <= 0 or height <= 0:
+            raise ValueError(f"view {spec!r} must have a positive size")
+    lat = lon = zoom = None
+    if match["zoom"]:
+        lat, lon, zoom = float(match["lat"]), float(match["lon"]), float(match["zoom"])
+        if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            raise ValueError(f"view {spec!r} has an invalid latitude/longitude")
+    clip = None
+    if match["clip"]:
+        clip = tuple(float(part) for part in match["clip"].split(","))
+        if clip[0] < 0 or clip[1] < 0 or clip[2] <= 0 or clip[3] <= 0:
+            raise ValueError(
+                f"view {spec!r} clip must have a non-negative origin and positive size"
+            )
+    return View(name=name, width=width, height=height, lat=lat, lon=lon, zoom=zoom, clip=clip)
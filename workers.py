@@ -0,0 +1,376 @@
+"""Spreading targets over several worker processes, each with its own browser.
+
+The supervisor partitions the targets by estimated cost, sends every worker
+its share as a config (applied with the same hot reload a config file uses),
+and watches the capture reports the workers send back. A worker that dies is
+respawned with the same targets, or has them spread over the others if it
+keeps dying; a worker whose captures keep waiting for a free page hands one
+target to the least loaded healthy worker.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Mapping, Sequence
+
+from config_file import ConfigSource
+
+logger = logging.getLogger(__name__)
+
+CHECK_SECONDS = 5.0
+# Weight of the newest report in each target's smoothed queueing delay.
+LAG_SMOOTHING = 0.3
+MOVE_COOLDOWN_SECONDS = 300.0
+CRASH_WINDOW_SECONDS = 600.0
+MAX_CRASHES = 3
+STOP_TIMEOUT_SECONDS = 60.0
+
+
+def target_cost(target: object) -> float:
+    """Captures per minute times outputs per capture: a rough share of one browser."""
+    if target.align_seconds:
+        rate = 60.0 / target.align_seconds
+    else:
+        rate = 2.0 / (target.min_minutes + target.max_minutes)
+    return rate * (1 + len(target.views))
+
+
+def partition(
+    targets: Sequence[object], workers: Sequence[int], current: Mapping[str, int] | None = None
+) -> dict[str, int]:
+    """Assign target names to worker numbers, balancing ``target_cost``.
+
+    Targets keep their ``current`` worker if it is still in ``workers``; the
+    rest go, most expensive first, to whichever worker has the least load.
+    """
+    current = current or {}
+    load = {worker: 0.0 for worker in workers}
+    assignment: dict[str, int] = {}
+    unplaced = []
+    for target in targets:
+        worker = current.get(target.name)
+        if worker in load:
+            assignment[target.name] = worker
+            load[worker] += target_cost(target)
+        else:
+            unplaced.append(target)
+    for target in sorted(unplaced, key=target_cost, reverse=True):
+        worker = min(load, key=lambda candidate: (load[candidate], candidate))
+        assignment[target.name] = worker
+        load[worker] += target_cost(target)
+    return assignment
+
+
+def worker_path(path: Path | None, number: int) -> Path | None:
+    """``logs/snapshotter.jsonl`` -> ``logs/snapshotter.worker2.jsonl``."""
+    if path is None:
+        return None
+    return path.with_name(f"{path.stem}.worker{number}{path.suffix}")
+
+
+def worker_config(config: object, number: int, targets: Sequence[object]) -> object:
+    """The config for one worker: its targets, and files and ports of its own."""
+    return replace(
+        config,
+        targets=tuple(targets),
+        workers=None,
+        # Workers poll their queue for new assignments even if the file is not polled.
+        config_poll_seconds=config.config_poll_seconds or 2.0,
+        log_file=worker_path(config.log_file, number),
+        timing_log=worker_path(config.timing_log, number),
+        metrics_port=config.metrics_port + number if config.metrics_port is not None else None,
+        cache_dir=config.cache_dir / f"worker{number}" if config.cache_dir is not None else None,
+    )
+
+
+class QueueConfigSource(ConfigSource):
+    """Configs sent by the supervisor; only the newest one waiting in the queue is applied."""
+
+    def __init__(self, configs: multiprocessing.Queue) -> None:
+        self.configs = configs
+        self.pending = None
+
+    def changed(self) -> bool:
+        while True:
+            try:
+                self.pending = self.configs.get_nowait()
+            except queue.Empty:
+                return self.pending is not None
+
+    def load(self) -> object:
+        # A SIGHUP sent to the whole process group asks for a reload with nothing new.
+        if not self.changed():
+            raise ValueError("no new config from the supervisor")
+        config, self.pending = self.pending, None
+        return config
+
+
+def worker_main(
+    run: Callable[..., None],
+    number: int,
+    config: object,
+    configs: multiprocessing.Queue,
+    reports: multiprocessing.Queue,
+) -> None:
+    def on_capture(target: str, status: str, timings: Mapping[str, float]) -> None:
+        reports.put((number, target, timings.get("queue", 0.0)))
+
+    try:
+        run(config, QueueConfigSource(configs), on_capture)
+    except KeyboardInterrupt:
+        pass
+
+
+@dataclass
+class Worker:
+    number: int
+    configs: multiprocessing.Queue
+    process: multiprocessing.Process | None = None
+    config: object = None
+    # Smoothed seconds each target's captures waited for a free page.
+    lag: dict[str, float] = field(default_factory=dict)
+    started_at: float = 0.0
+    last_report: float = 0.0
+    moved_at: float = 0.0
+    crashes: list[float] = field(default_factory=list)
+    given_up: bool = False
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class WorkerPool:
+    """Runs ``config.targets`` on ``count`` worker processes, each calling ``run``.
+
+    ``restart_needed`` tells which process-wide settings of a reloaded config
+    cannot be applied to running workers.
+    """
+
+    def __init__(
+        self,
+        config: object,
+        count: int,
+        run: Callable[..., None],
+        restart_needed: Callable[[object, object], list[str]],
+        source: ConfigSource | None = None,
+    ) -> None:
+        self.config = config
+        self.run = run
+        self.restart_needed = restart_needed
+        self.source = source
+        # Spawned workers start from a clean interpreter rather than a copy of
+        # this process and its threads.
+        self.context = multiprocessing.get_context("spawn")
+        self.reports = self.context.Queue()
+        self.workers = [
+            Worker(number=number, configs=self.context.Queue())
+            for number in range(1, count + 1)
+        ]
+        self.assignment = partition(config.targets, self.numbers())
+        self.reload_requested = threading.Event()
+
+    def numbers(self) -> list[int]:
+        return [worker.number for worker in self.workers if not worker.given_up]
+
+    def targets_of(self, worker: Worker) -> list[object]:
+        return [
+            target for target in self.config.targets
+            if self.assignment.get(target.name) == worker.number
+        ]
+
+    def stall_seconds(self, worker: Worker) -> float:
+        """How long a worker with targets may go without completing a capture."""
+        longest = max(
+            (
+                (target.align_seconds or target.max_minutes * 60.0) + target.watchdog_seconds
+                for target in self.targets_of(worker)
+            ),
+            default=0.0,
+        )
+        return longest + 120.0
+
+    def spawn(self, worker: Worker) -> None:
+        worker.config = worker_config(self.config, worker.number, self.targets_of(worker))
+        worker.process = self.context.Process(
+            target=worker_main,
+            args=(self.run, worker.number, worker.config, worker.configs, self.reports),
+            name=f"snapshotter-worker{worker.number}",
+        )
+        worker.process.start()
+        worker.started_at = worker.last_report = time.monotonic()
+        worker.lag.clear()
+        names = ", ".join(target.name for target in worker.config.targets) or "no targets"
+        logger.info(f"Started worker {worker.number} (pid {worker.process.pid}): {names}")
+
+    def send_assignments(self) -> None:
+        """Send every running worker whose share changed its new config."""
+        for worker in self.workers:
+            if worker.given_up:
+                continue
+            config = worker_config(self.config, worker.number, self.targets_of(worker))
+            if config == worker.config:
+                continue
+            idle = worker.config is None or not worker.config.targets
+            worker.config = config
+            worker.lag = {name: lag for name, lag in worker.lag.items() if name in self.assignment}
+            if worker.alive:
+                if idle:
+                    # A worker without targets reports nothing; time stalls from now.
+                    worker.last_report = time.monotonic()
+                worker.configs.put(config)
+            elif worker.process is None and config.targets:
+                self.spawn(worker)
+
+    def collect_reports(self) -> None:
+        now = time.monotonic()
+        while True:
+            try:
+                number, target, lag = self.reports.get_nowait()
+            except queue.Empty:
+                return
+            worker = self.workers[number - 1]
+            worker.last_report = now
+            if self.assignment.get(target) != number:
+                continue
+            previous = worker.lag.get(target)
+            worker.lag[target] = (
+                lag if previous is None else previous + LAG_SMOOTHING * (lag - previous)
+            )
+
+    def check_workers(self) -> None:
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.given_up or worker.process is None:
+                continue
+            if worker.alive and self.targets_of(worker):
+                if now - worker.last_report > self.stall_seconds(worker):
+                    logger.warning(
+                        f"worker {worker.number} completed no capture in "
+                        f"{now - worker.last_report:.0f}s; killing it.",
+                        extra={"reason": "stalled"},
+                    )
+                    worker.process.kill()
+                    worker.process.join()
+            if worker.alive:
+                continue
+
+            exitcode = worker.process.exitcode
+            worker.process = None
+            worker.crashes = [
+                moment for moment in worker.crashes if now - moment < CRASH_WINDOW_SECONDS
+            ]
+            worker.crashes.append(now)
+            if len(worker.crashes) < MAX_CRASHES or len(self.numbers()) == 1:
+                logger.warning(
+                    f"worker {worker.number} exited with code {exitcode}; restarting it.",
+                    extra={"reason": "worker_exit"},
+                )
+                self.spawn(worker)
+                continue
+            worker.given_up = True
+            logger.error(
+                f"worker {worker.number} exited {len(worker.crashes)} times in "
+                f"{CRASH_WINDOW_SECONDS / 60:g} minutes; moving its targets to the other workers.",
+                extra={"reason": "worker_exit"},
+            )
+            self.reassign()
+
+    def rebalance(self) -> None:
+        """Move one target off a worker whose captures keep waiting for a free page."""
+        limit = self.config.worker_max_lag_seconds
+        now = time.monotonic()
+        healthy = [
+            worker for worker in self.workers
+            if worker.alive and max(worker.lag.values(), default=0.0) < limit / 2
+        ]
+        for worker in self.workers:
+            if not worker.alive or now - worker.moved_at < MOVE_COOLDOWN_SECONDS:
+                continue
+            targets = self.targets_of(worker)
+            lagging = {
+                name: lag for name, lag in worker.lag.items()
+                if lag > limit and any(target.name == name for target in targets)
+            }
+            if not lagging or len(targets) < 2:
+                continue
+            receivers = [
+                other for other in healthy
+                if other is not worker and now - other.moved_at >= MOVE_COOLDOWN_SECONDS
+            ]
+            if not receivers:
+                continue
+            receiver = min(
+                receivers,
+                key=lambda other: sum(target_cost(target) for target in self.targets_of(other)),
+            )
+            name = max(lagging, key=lagging.get)
+            logger.warning(
+                f"worker {worker.number} is falling behind ({lagging[name]:.0f}s waiting for a "
+                f"page); moving {name} to worker {receiver.number}.",
+                extra={"target": name, "reason": "rebalance"},
+            )
+            self.assignment[name] = receiver.number
+            worker.lag.pop(name, None)
+            worker.moved_at = receiver.moved_at = now
+            healthy.remove(receiver)
+        self.send_assignments()
+
+    def reassign(self) -> None:
+        current = {
+            name: number for name, number in self.assignment.items() if number in self.numbers()
+        }
+        self.assignment = partition(self.config.targets, self.numbers(), current)
+        self.send_assignments()
+
+    def reload(self) -> None:
+        try:
+            loaded = self.source.load()
+        except (ValueError, OSError) as exc:
+            logger.error(f"config reload failed; keeping the running config: {exc}")
+            return
+        ignored = self.restart_needed(self.config, loaded)
+        if ignored:
+            logger.warning(
+                f"config reload: changes to {', '.join(ignored)} need a restart; ignored."
+            )
+        self.config = replace(loaded, **{name: getattr(self.config, name) for name in ignored})
+        self.reassign()
+        logger.info(f"Reloaded config: {len(self.config.targets)} target(s).")
+
+    def serve(self, stop: threading.Event) -> None:
+        """Start the workers and supervise them until ``stop`` is set."""
+        logger.info(
+            f"Running {len(self.config.targets)} target(s) "
+            f"on {len(self.workers)} worker process(es)."
+        )
+        for worker in self.workers:
+            self.spawn(worker)
+        while not stop.wait(CHECK_SECONDS):
+            self.collect_reports()
+            if self.source is not None and (
+                self.reload_requested.is_set() or self.source.changed()
+            ):
+                self.reload_requested.clear()
+                self.reload()
+            self.check_workers()
+            self.rebalance()
+
+    def close(self) -> None:
+        """Ask every worker to stop (SIGTERM) and wait for them to write their frames."""
+        running = [worker.process for worker in self.workers if worker.alive]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + STOP_TIMEOUT_SECONDS
+        for process in running:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"{process.name} did not stop in time; killing it.")
+                process.kill()
+                process.join()